@@ -2,15 +2,26 @@
 import os
 import time
 import uuid
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 import uvicorn
 
+try:
+    # orjson-backed responses serialize several times faster than the
+    # stdlib encoder; fall back silently when orjson isn't installed
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponseClass
+except ImportError:
+    DefaultResponseClass = JSONResponse
+
 from .models import (
     ServiceInfo, HealthCheckResponse, ServiceStatus, 
     PDFOperationType, PDFProcessingResponse
@@ -41,7 +52,8 @@ class BasePDFMicroservice(ABC):
         self.app = FastAPI(
             title=f"PDF {service_name.title()} Service",
             description=f"Microservice for PDF {service_name.lower()} operations",
-            version=version
+            version=version,
+            default_response_class=DefaultResponseClass
         )
         
         # Add CORS middleware
@@ -57,9 +69,11 @@ class BasePDFMicroservice(ABC):
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(f"pdf-{service_name}")
         
-        # Create directories
+        # Create directories (Path forms cached for per-request path math)
         self.upload_dir = f"temp/{service_name}"
         self.output_dir = f"output/{service_name}"
+        self.upload_path = Path(self.upload_dir)
+        self.output_path = Path(self.output_dir)
         os.makedirs(self.upload_dir, exist_ok=True)
         os.makedirs(self.output_dir, exist_ok=True)
         
@@ -71,7 +85,21 @@ class BasePDFMicroservice(ABC):
     
     def _register_routes(self):
         """Register common routes for the service."""
-        
+
+        @self.app.on_event("startup")
+        async def size_thread_pool():
+            """Install a larger default executor for CPU-bound PDF work.
+
+            The services dispatch blocking work with asyncio.to_thread,
+            which runs on the event loop's default ThreadPoolExecutor -
+            capped at min(32, cpus + 4) out of the box, well below what
+            the PDF workloads can use.
+            """
+            loop = asyncio.get_running_loop()
+            loop.set_default_executor(
+                ThreadPoolExecutor(max_workers=max(64, (os.cpu_count() or 1) * 8))
+            )
+
         @self.app.get("/health", response_model=HealthCheckResponse)
         async def health_check():
             """Health check endpoint."""
@@ -209,7 +237,16 @@ class BasePDFMicroservice(ABC):
         port = port or self.port
         
         self.logger.info(f"Starting {self.service_name} service on {host}:{port}")
-        
+
+        # Prefer uvloop when installed - uvicorn's "auto" loop picks it
+        # up from the event loop policy
+        try:
+            import asyncio
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
+
         uvicorn.run(
             self.app,
             host=host,
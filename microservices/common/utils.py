@@ -1,5 +1,6 @@
 """Common utilities for PDF microservices."""
 import os
+import re
 import shutil
 import hashlib
 import tempfile
@@ -105,6 +106,9 @@ def create_temp_file(suffix: str = "", prefix: str = "pdf_") -> str:
         return f.name
 
 
+_PAGE_RANGE_RE = re.compile(r"^(\d+)(?:\s*-\s*(\d+))?$")
+
+
 def parse_page_range(page_range: str, total_pages: int) -> Optional[List[int]]:
     """
     Parse page range string and return list of 0-indexed page numbers.
@@ -118,38 +122,27 @@ def parse_page_range(page_range: str, total_pages: int) -> Optional[List[int]]:
     """
     try:
         pages = set()
-        
-        # Split by commas and process each part
-        parts = [part.strip() for part in page_range.split(',')]
-        
-        for part in parts:
-            if '-' in part:
-                # Handle range like "1-3"
-                start, end = part.split('-', 1)
-                start_page = int(start.strip())
-                end_page = int(end.strip())
-                
-                # Validate range
-                if start_page < 1 or end_page > total_pages or start_page > end_page:
-                    return None
-                
-                # Add pages to set (convert to 0-indexed)
-                for page_num in range(start_page - 1, end_page):
-                    pages.add(page_num)
-            else:
-                # Handle single page like "5"
-                page_num = int(part.strip())
-                
-                # Validate page number
-                if page_num < 1 or page_num > total_pages:
-                    return None
-                
-                # Add page to set (convert to 0-indexed)
-                pages.add(page_num - 1)
-        
-        return sorted(list(pages))
-    
-    except (ValueError, AttributeError):
+
+        # One regex match and one set.update per comma part keeps the
+        # hot loop linear in the number of ranges, not pages
+        for part in page_range.split(','):
+            match = _PAGE_RANGE_RE.match(part.strip())
+            if not match:
+                return None
+
+            start_page = int(match.group(1))
+            end_page = int(match.group(2)) if match.group(2) else start_page
+
+            # Validate range
+            if start_page < 1 or end_page > total_pages or start_page > end_page:
+                return None
+
+            # Add pages to set (convert to 0-indexed)
+            pages.update(range(start_page - 1, end_page))
+
+        return sorted(pages)
+
+    except AttributeError:
         return None
 
 
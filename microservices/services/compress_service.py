@@ -5,9 +5,19 @@ Handles compressing PDF files to reduce file size.
 import os
 import sys
 import time
+import zlib
+import shutil
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
 from pathlib import Path
 
-from PyPDF2 import PdfReader, PdfWriter
+import pikepdf
+
+try:
+    import deflate  # libdeflate bindings for the max-compression tier
+except ImportError:
+    deflate = None
 from fastapi import HTTPException, UploadFile, File, Form
 from fastapi.responses import FileResponse
 
@@ -21,6 +31,89 @@ from microservices.common.models import (
 from utils.file_ops import get_unique_filename, get_file_size_mb
 
 
+def _page_pixel_budget(page, target_dpi: int):
+    """Pixel budget for a page's images when rendered at target_dpi."""
+    box = page.mediabox
+    page_width_in = (float(box[2]) - float(box[0])) / 72
+    page_height_in = (float(box[3]) - float(box[1])) / 72
+    return (max(int(page_width_in * target_dpi), 1),
+            max(int(page_height_in * target_dpi), 1))
+
+
+def _shrink_image(raw_image, max_px, jpeg_quality: int):
+    """
+    Try to downsample/re-encode one image.
+
+    Returns (jpeg_bytes, width, height, mode) when the JPEG comes out
+    smaller than the existing stream, else None. Image masks, CMYK and
+    soft-masked images are never touched.
+    """
+    try:
+        pdf_image = pikepdf.PdfImage(raw_image)
+        if pdf_image.image_mask:
+            return None
+        if pikepdf.Name.SMask in raw_image:
+            return None  # keep transparency intact
+
+        pil = pdf_image.as_pil_image()
+        if pil.mode == "CMYK":
+            return None
+        if pil.mode not in ("RGB", "L"):
+            pil = pil.convert("RGB")
+
+        if pil.width > max_px[0] or pil.height > max_px[1]:
+            pil.thumbnail(max_px)
+
+        buffer = BytesIO()
+        pil.save(buffer, "JPEG", quality=jpeg_quality,
+                 optimize=True, progressive=True)
+        data = buffer.getvalue()
+
+        # Only take the rewrite when it actually shrinks
+        if len(data) >= len(raw_image.read_raw_bytes()):
+            return None
+        return data, pil.width, pil.height, pil.mode
+    except Exception:
+        return None
+
+
+def _apply_image_replacement(raw_image, shrunk) -> None:
+    """Write a _shrink_image result back over the image stream."""
+    data, width, height, mode = shrunk
+    raw_image.write(data, filter=pikepdf.Name.DCTDecode)
+    raw_image.Width = width
+    raw_image.Height = height
+    raw_image.BitsPerComponent = 8
+    raw_image.ColorSpace = (pikepdf.Name.DeviceRGB if mode == "RGB"
+                            else pikepdf.Name.DeviceGray)
+    for stale in ("/DecodeParms", "/Decode"):
+        if stale in raw_image:
+            del raw_image[stale]
+
+
+def _recompress_page_images(input_path: str, page_index: int,
+                            target_dpi: int, jpeg_quality: int) -> dict:
+    """
+    Recompress one page's images in a worker process.
+
+    Opens the source independently (process-pool worker) and returns
+    {objgen: shrink-result} for images that got smaller; the parent
+    applies the bytes to its own handle before saving.
+    """
+    results = {}
+    with pikepdf.open(input_path) as pdf:
+        page = pdf.pages[page_index]
+        try:
+            max_px = _page_pixel_budget(page, target_dpi)
+        except Exception:
+            return results
+        for _, raw_image in page.images.items():
+            shrunk = _shrink_image(raw_image, max_px, jpeg_quality)
+            if shrunk is not None:
+                results[tuple(raw_image.objgen)] = shrunk
+    return results
+
+
 class PDFCompressService(BasePDFMicroservice):
     """PDF Compression microservice."""
     
@@ -45,8 +138,10 @@ class PDFCompressService(BasePDFMicroservice):
                 # Save uploaded file
                 input_path = Path(self.upload_dir) / file.filename
                 with open(input_path, "wb") as f:
-                    content = await file.read()
-                    f.write(content)
+                    # Stream in 1 MiB chunks - keeps per-request memory
+                    # constant instead of O(file size)
+                    while chunk := await file.read(1024 * 1024):
+                        f.write(chunk)
                 
                 # Map quality string to numeric value
                 quality_map = {"low": 30, "medium": 50, "high": 70, "maximum": 90}
@@ -143,9 +238,168 @@ class PDFCompressService(BasePDFMicroservice):
         """Get service-specific endpoints."""
         return ["/compress", "/process"]
     
+    def _recompress_images(self, pdf, target_dpi: int, jpeg_quality: int) -> int:
+        """
+        Downsample and JPEG-recompress page images (single process).
+
+        Images are scaled so they render at roughly target_dpi for
+        their page and re-encoded as JPEG at the requested quality.
+        Returns the number of images rewritten.
+        """
+        recompressed = 0
+        seen = set()
+        for page in pdf.pages:
+            try:
+                max_px = _page_pixel_budget(page, target_dpi)
+            except Exception:
+                continue
+            for _, raw_image in page.images.items():
+                objgen = tuple(raw_image.objgen)
+                if objgen in seen:
+                    continue
+                seen.add(objgen)
+                shrunk = _shrink_image(raw_image, max_px, jpeg_quality)
+                if shrunk is not None:
+                    _apply_image_replacement(raw_image, shrunk)
+                    recompressed += 1
+        return recompressed
+
+    def _recompress_images_parallel(self, pdf, input_path: str,
+                                    target_dpi: int, jpeg_quality: int) -> int:
+        """
+        Recompress images with one worker process per page.
+
+        JPEG encoding is the bottleneck once image recompression is on
+        and pages are independent, so workers each open the input and
+        shrink their page's images; the parent applies the returned
+        bytes to its own handle. Falls back to the serial path for
+        single-page files or if the pool fails.
+        """
+        page_count = len(pdf.pages)
+        if page_count <= 1:
+            return self._recompress_images(pdf, target_dpi, jpeg_quality)
+
+        try:
+            max_workers = min(page_count, os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                page_results = list(executor.map(
+                    _recompress_page_images,
+                    [input_path] * page_count,
+                    range(page_count),
+                    [target_dpi] * page_count,
+                    [jpeg_quality] * page_count
+                ))
+        except Exception as e:
+            self.logger.warning(f"Parallel image recompression failed: {str(e)}")
+            return self._recompress_images(pdf, target_dpi, jpeg_quality)
+
+        applied = 0
+        seen = set()
+        for replacements in page_results:
+            for objgen, shrunk in replacements.items():
+                if objgen in seen:
+                    continue
+                seen.add(objgen)
+                _apply_image_replacement(pdf.get_object(objgen), shrunk)
+                applied += 1
+        return applied
+
+    def _estimate_stream_ratio(self, pdf, sample_pages: int = 5) -> float:
+        """
+        Mean recompression ratio of the first few content streams.
+
+        Values near 1.0 mean the streams are already tightly deflated
+        and a stream-only rewrite would burn CPU to save nothing.
+        """
+        ratios = []
+        for page in list(pdf.pages)[:sample_pages]:
+            try:
+                contents = page.Contents
+            except AttributeError:
+                continue
+            streams = contents if isinstance(contents, pikepdf.Array) else [contents]
+            for stream_obj in streams:
+                try:
+                    if stream_obj.get("/Filter") != pikepdf.Name.FlateDecode:
+                        continue
+                    raw = stream_obj.read_raw_bytes()
+                    if len(raw) < 256:
+                        continue
+                    ratios.append(len(zlib.compress(zlib.decompress(raw), 9)) / len(raw))
+                except Exception:
+                    continue
+        return sum(ratios) / len(ratios) if ratios else 0.0
+
+    def _dedupe_images(self, pdf) -> int:
+        """
+        Point duplicate image XObjects at one shared stream.
+
+        Scanners and exporters frequently embed the same image (logos,
+        page backgrounds) once per page. Hash each image stream's raw
+        bytes plus its decode-relevant keys and rewrite later
+        occurrences to reference the first; the orphaned copies are
+        dropped by remove_unreferenced_resources before saving.
+        """
+        canonical = {}
+        rewritten = 0
+        for page in pdf.pages:
+            try:
+                xobjects = page.Resources.XObject
+            except AttributeError:
+                continue
+            for name in list(xobjects.keys()):
+                try:
+                    obj = xobjects[name]
+                    if obj.get("/Subtype") != pikepdf.Name.Image:
+                        continue
+                    key = (
+                        hashlib.sha1(obj.read_raw_bytes()).digest(),
+                        str(obj.get("/Filter")),
+                        str(obj.get("/ColorSpace")),
+                        int(obj.get("/Width", 0)),
+                        int(obj.get("/Height", 0)),
+                    )
+                    existing = canonical.get(key)
+                    if existing is None:
+                        canonical[key] = obj
+                    elif existing.objgen != obj.objgen:
+                        xobjects[name] = existing
+                        rewritten += 1
+                except Exception:
+                    continue
+        return rewritten
+
+    def _recompress_flate_streams(self, pdf) -> int:
+        """
+        Re-deflate FlateDecode streams with libdeflate at level 12.
+
+        The brute-force DEFLATE search finds shorter Huffman/LZ
+        encodings that any zlib decoder still reads, typically trimming
+        5-20% off content-stream-heavy PDFs. Streams under 256 bytes
+        are skipped (recompression can grow them). Returns the number
+        of streams rewritten.
+        """
+        rewritten = 0
+        for obj in pdf.objects:
+            try:
+                if not isinstance(obj, pikepdf.Stream):
+                    continue
+                if obj.get("/Filter") != pikepdf.Name.FlateDecode:
+                    continue
+                raw = obj.read_raw_bytes()
+                if len(raw) < 256:
+                    continue
+                recompressed = deflate.zlib_compress(zlib.decompress(raw), 12)
+                if len(recompressed) < len(raw):
+                    obj.write(recompressed, filter=pikepdf.Name.FlateDecode)
+                    rewritten += 1
+            except Exception:
+                continue  # Leave undecodable streams untouched
+        return rewritten
+
     async def _compress_pdf_file(self, input_path: str, output_path: str, quality: int) -> tuple:
         """
-        Compress a PDF file using PyPDF2 optimization.
+        Compress a PDF file using pikepdf (qpdf) optimization.
         
         Args:
             input_path: Path to input PDF
@@ -158,41 +412,92 @@ class PDFCompressService(BasePDFMicroservice):
         try:
             original_size = get_file_size_mb(input_path)
             
-            # Open PDF - handle encrypted PDFs
+            # Open PDF - handle encrypted PDFs (qpdf opens unprotected
+            # and empty-password files alike)
             try:
-                reader = PdfReader(input_path)
-                # Try to decrypt if encrypted
-                if reader.is_encrypted:
-                    try:
-                        reader.decrypt("")  # Try empty password
-                    except:
-                        self.logger.error("PDF is password-protected")
-                        return False, 0, 0
+                pdf = pikepdf.open(input_path)
+            except pikepdf.PasswordError:
+                self.logger.error("PDF is password-protected")
+                return False, 0, 0
             except Exception as e:
                 self.logger.error(f"Cannot read PDF: {str(e)}")
                 return False, 0, 0
             
-            writer = PdfWriter()
-            
-            # Add all pages with optimization
-            for page in reader.pages:
-                writer.add_page(page)
-            
-            # Apply compression to content streams
-            try:
-                for page in writer.pages:
-                    if hasattr(page, 'compress_content_streams'):
-                        page.compress_content_streams()
-            except:
-                pass  # Skip if compression not available
-            
-            # Remove metadata to reduce size (if quality is high compression)
-            if quality <= 50:  # High compression
-                writer.add_metadata({})
-            
-            # Save with compression
-            with open(output_path, "wb") as output_file:
-                writer.write(output_file)
+            with pdf:
+                # Remove metadata to reduce size (if quality is high compression)
+                if quality <= 50:  # High compression
+                    for drop in ("Info",):
+                        try:
+                            del pdf.trailer[f"/{drop}"]
+                        except KeyError:
+                            pass
+                    try:
+                        del pdf.Root.Metadata  # XMP packet
+                    except (AttributeError, KeyError):
+                        pass
+                
+                # Collapse duplicate images, then let qpdf drop the
+                # orphans (and any other unreferenced resources)
+                deduped = self._dedupe_images(pdf)
+                if deduped:
+                    self.logger.info(f"Deduplicated {deduped} image references")
+                try:
+                    pdf.remove_unreferenced_resources()
+                except Exception as e:
+                    self.logger.warning(f"Resource GC skipped: {str(e)}")
+                
+                # Map the quality presets to image DPI / JPEG levels;
+                # the maximum-quality preset leaves images untouched
+                if quality <= 30:
+                    image_params = (90, 60)
+                elif quality <= 50:
+                    image_params = (120, 75)
+                elif quality <= 70:
+                    image_params = (150, 85)
+                else:
+                    image_params = None
+
+                # Already-optimized PDF and no image work planned:
+                # probe a few content streams and skip the rewrite when
+                # nothing would shrink (>0.97 predicted ratio)
+                if image_params is None and self._estimate_stream_ratio(pdf) > 0.97:
+                    shutil.copyfile(input_path, output_path)
+                    compressed_size = get_file_size_mb(output_path)
+                    self.logger.info("Input already optimized; returning copy")
+                    return True, original_size, compressed_size
+
+                if image_params is not None:
+                    images_done = self._recompress_images_parallel(
+                        pdf, input_path, *image_params
+                    )
+                    if images_done:
+                        self.logger.info(f"Recompressed {images_done} images "
+                                         f"at {image_params[0]} DPI / q{image_params[1]}")
+
+                # Lower quality asks for harder compression: fully
+                # re-encode streams for low/medium, keep existing
+                # encodings for high/maximum
+                if quality <= 30 and deflate is not None:
+                    # Maximum-compression tier: brute-force re-deflate
+                    # with libdeflate, then keep those streams as-is on
+                    # save so qpdf doesn't re-encode them at level 6
+                    rewritten = self._recompress_flate_streams(pdf)
+                    self.logger.info(f"libdeflate recompressed {rewritten} streams")
+                    decode_level = pikepdf.StreamDecodeLevel.none
+                elif quality <= 50:
+                    decode_level = pikepdf.StreamDecodeLevel.generalized
+                else:
+                    decode_level = pikepdf.StreamDecodeLevel.none
+                
+                # qpdf re-deflates streams and packs objects into
+                # object streams in C++ - no per-page Python loop
+                pdf.save(
+                    output_path,
+                    compress_streams=True,
+                    object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                    stream_decode_level=decode_level,
+                    linearize=False
+                )
             
             compressed_size = get_file_size_mb(output_path)
             
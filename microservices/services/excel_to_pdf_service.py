@@ -0,0 +1,277 @@
+"""
+Excel to PDF Conversion Microservice
+Handles converting Excel workbooks to PDF.
+"""
+import os
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+from openpyxl import load_workbook
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import (
+    SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+)
+from fastapi import HTTPException, UploadFile, File
+from fastapi.responses import FileResponse
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from microservices.common.base_service import BasePDFMicroservice
+from microservices.common.models import (
+    PDFOperationType, PDFProcessingResponse, ConversionRequest
+)
+from utils.file_ops import get_unique_filename
+
+# Rows per reportlab Table: layout cost grows superlinearly with table
+# height, so big sheets are emitted as a sequence of bounded tables
+_TABLE_CHUNK_ROWS = 200
+
+# Shared cell style, built once at import
+_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+
+def _clip_cell(value: str) -> str:
+    """Clip extreme cell text - huge strings trip reportlab's slow
+    cell-sizing path and can't be read in a table cell anyway."""
+    return value if len(value) < 500 else value[:497] + "..."
+
+
+class ExcelToPDFService(BasePDFMicroservice):
+    """Excel to PDF conversion microservice."""
+
+    def __init__(self, host: str = "localhost", port: int = 8016):
+        super().__init__(
+            service_name="excel-to-pdf-service",
+            operation_type=PDFOperationType.EXCEL_TO_PDF,
+            host=host,
+            port=port
+        )
+
+    def _register_service_routes(self):
+        """Register service-specific routes."""
+
+        @self.app.post("/process")
+        async def process_excel(
+            file: UploadFile = File(...)
+        ):
+            """Process Excel file - convert to PDF."""
+            try:
+                # Check if file is an Excel workbook
+                # Both loaders are openpyxl-backed, which cannot read
+                # legacy .xls - reject those up front with a 400
+                if not any(file.filename.lower().endswith(ext) for ext in ['.xlsx', '.xlsm']):
+                    raise HTTPException(status_code=400, detail=f"{file.filename} is not a valid Excel format")
+
+                # Save uploaded file
+                input_path = self.upload_path / file.filename
+                with open(input_path, "wb") as f:
+                    # Stream in 1 MiB chunks - keeps per-request memory
+                    # constant instead of O(file size)
+                    while chunk := await file.read(1024 * 1024):
+                        f.write(chunk)
+
+                # Generate output filename
+                output_filename = f"{Path(file.filename).stem}.pdf"
+                output_path = Path(get_unique_filename(output_filename, self.output_dir))
+
+                # Convert Excel to PDF (CPU-bound - run off the event loop)
+                success = await asyncio.to_thread(
+                    self._convert_excel_to_pdf, str(input_path), str(output_path)
+                )
+
+                if not success:
+                    raise HTTPException(status_code=500, detail="Failed to convert Excel to PDF")
+
+                # Return the PDF file
+                return FileResponse(
+                    path=str(output_path),
+                    media_type="application/pdf",
+                    filename=output_path.name
+                )
+
+            except HTTPException:
+                raise
+            except Exception as e:
+                self.logger.error(f"Process error: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        @self.app.post("/excel-to-pdf", response_model=PDFProcessingResponse)
+        async def convert_excel_to_pdf(request: ConversionRequest) -> PDFProcessingResponse:
+            """Convert Excel workbook to PDF."""
+            start_time = time.time()
+
+            try:
+                # Validate file exists
+                input_path = self.upload_path / request.file_name
+                if not input_path.exists():
+                    raise HTTPException(status_code=404, detail=f"File {request.file_name} not found")
+
+                # Generate output filename
+                output_filename = f"{Path(request.file_name).stem}.pdf"
+                output_path = Path(get_unique_filename(output_filename, self.output_dir))
+
+                # Convert Excel to PDF (CPU-bound - run off the event loop)
+                success = await asyncio.to_thread(
+                    self._convert_excel_to_pdf, str(input_path), str(output_path)
+                )
+
+                if not success:
+                    raise HTTPException(status_code=500, detail="Failed to convert Excel to PDF")
+
+                # Calculate processing time
+                processing_time = (time.time() - start_time) * 1000
+
+                # Get file size
+                file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+
+                return PDFProcessingResponse(
+                    success=True,
+                    message="Successfully converted Excel to PDF",
+                    file_url=f"/download/{output_path.name}",
+                    file_size_mb=file_size_mb,
+                    processing_time_ms=processing_time,
+                    operation_id=request.operation_id,
+                    metadata={
+                        "operation": "excel_to_pdf",
+                        "input_file": request.file_name,
+                        "output_file": output_path.name
+                    }
+                )
+
+            except HTTPException:
+                raise
+            except Exception as e:
+                self.logger.error(f"Excel to PDF conversion error: {str(e)}")
+                processing_time = (time.time() - start_time) * 1000
+
+                return PDFProcessingResponse(
+                    success=False,
+                    message="Failed to convert Excel to PDF",
+                    processing_time_ms=processing_time,
+                    error_details=str(e)
+                )
+
+    def _get_service_endpoints(self) -> list:
+        """Get service-specific endpoints."""
+        return ["/excel-to-pdf", "/process"]
+
+    def _load_sheets(self, input_path: str) -> dict:
+        """
+        Load every sheet as a list of string rows (header first).
+
+        pandas ingests the whole workbook in one call, so the N x M
+        cell conversion runs in the NumPy/C path instead of a per-cell
+        Python str() loop; empty-row filtering is vectorized too.
+        """
+        if pd is None:
+            return self._load_sheets_openpyxl(input_path)
+
+        sheets = pd.read_excel(input_path, sheet_name=None, dtype=str,
+                               na_filter=False, engine="openpyxl")
+
+        data_by_sheet = {}
+        for sheet_name, df in sheets.items():
+            if df.columns.empty:
+                continue  # unused empty sheet - the openpyxl loader skips these too
+            df = df[df.ne("").any(axis=1)]
+            # Clip pathological cell lengths only when any exist
+            if not df.empty and df.map(len).ge(500).values.any():
+                df = df.map(_clip_cell)
+            data_by_sheet[sheet_name] = (
+                [[str(col) for col in df.columns]] + df.values.tolist()
+            )
+        return data_by_sheet
+
+    def _load_sheets_openpyxl(self, input_path: str) -> dict:
+        """
+        Stream sheets with openpyxl when pandas is unavailable.
+
+        read_only mode parses rows lazily instead of materializing the
+        whole cell-object DOM, and values_only rows arrive as plain
+        tuples with no Cell construction at all.
+        """
+        wb = load_workbook(input_path, data_only=True, read_only=True)
+        try:
+            data_by_sheet = {}
+            for ws in wb.worksheets:
+                rows = []
+                for row in ws.iter_rows(values_only=True):
+                    if not any(value is not None for value in row):
+                        continue
+                    rows.append(["" if value is None else _clip_cell(str(value)) for value in row])
+                if rows:
+                    data_by_sheet[ws.title] = rows
+            return data_by_sheet
+        finally:
+            wb.close()
+
+    def _convert_excel_to_pdf(self, input_path: str, output_path: str) -> bool:
+        """
+        Convert an Excel workbook to PDF.
+
+        Args:
+            input_path: Path to input workbook
+            output_path: Path to save PDF
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            data_by_sheet = self._load_sheets(input_path)
+            if not data_by_sheet:
+                self.logger.error("Workbook contains no sheets")
+                return False
+
+            doc = SimpleDocTemplate(output_path, pagesize=landscape(A4))
+            heading_style = getSampleStyleSheet()['Heading1']
+            elements = []
+
+            for sheet_idx, (sheet_name, data) in enumerate(data_by_sheet.items()):
+                if sheet_idx:
+                    elements.append(PageBreak())
+
+                elements.append(Paragraph(sheet_name, heading_style))
+                elements.append(Spacer(1, 12))
+
+                # One bounded Table per chunk keeps layout linear in row
+                # count; the header row is prepended to every chunk
+                header, body = data[0], data[1:]
+                for chunk_start in range(0, max(len(body), 1), _TABLE_CHUNK_ROWS):
+                    if chunk_start:
+                        elements.append(PageBreak())
+                    chunk = body[chunk_start:chunk_start + _TABLE_CHUNK_ROWS]
+                    table = Table([header] + chunk, repeatRows=1)
+                    table.setStyle(_TABLE_STYLE)
+                    elements.append(table)
+
+            doc.build(elements)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error converting Excel to PDF: {str(e)}")
+            return False
+
+
+def main():
+    """Run the Excel to PDF service."""
+    service = ExcelToPDFService()
+    service.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 """PDF Merge Microservice."""
 import os
+import mmap
 import time
+import asyncio
 from typing import List
 from pathlib import Path
 from fastapi import HTTPException, UploadFile, File
@@ -43,7 +45,7 @@ class PDFMergeService(BasePDFMicroservice):
                 # Save all uploaded files
                 input_paths = []
                 for file in files:
-                    input_path = Path(self.upload_dir) / file.filename
+                    input_path = self.upload_path / file.filename
                     with open(input_path, "wb") as f:
                         content = await file.read()
                         f.write(content)
@@ -51,10 +53,12 @@ class PDFMergeService(BasePDFMicroservice):
                 
                 # Generate output filename
                 output_filename = "merged.pdf"
-                output_path = Path(get_unique_filename(output_filename, str(self.output_dir)))
+                output_path = Path(get_unique_filename(output_filename, self.output_dir))
                 
-                # Merge PDFs
-                success = self._merge_pdf_files(input_paths, str(output_path))
+                # Merge PDFs (CPU/disk heavy - run off the event loop)
+                success = await asyncio.to_thread(
+                    self._merge_pdf_files, input_paths, str(output_path)
+                )
                 
                 if not success:
                     raise HTTPException(status_code=500, detail="Failed to merge PDFs")
@@ -76,19 +80,22 @@ class PDFMergeService(BasePDFMicroservice):
             start_time = time.time()
             
             try:
-                # Validate input files exist
-                input_files = []
+                # Validate input files exist - stat all files in parallel so
+                # slow (networked) filesystems pay one round-trip, not N
+                input_files = [self.get_file_path(name) for name in request.file_names]
+                stat_results = await asyncio.gather(
+                    *[asyncio.to_thread(os.stat, path) for path in input_files],
+                    return_exceptions=True
+                )
+
                 total_size = 0
-                
-                for file_name in request.file_names:
-                    file_path = self.get_file_path(file_name)
-                    if not os.path.exists(file_path):
+                for file_name, stat_result in zip(request.file_names, stat_results):
+                    if isinstance(stat_result, OSError):
                         raise HTTPException(
-                            status_code=404, 
+                            status_code=404,
                             detail=f"File not found: {file_name}"
                         )
-                    input_files.append(file_path)
-                    total_size += self.get_file_size_mb(file_path)
+                    total_size += stat_result.st_size / (1024 * 1024)
                 
                 self.logger.info(f"Merging {len(input_files)} files, total size: {total_size:.2f} MB")
                 
@@ -96,8 +103,10 @@ class PDFMergeService(BasePDFMicroservice):
                 output_filename = request.output_filename or "merged.pdf"
                 output_path = get_unique_filename(output_filename, self.output_dir)
                 
-                # Merge PDFs
-                success = self._merge_pdf_files(input_files, output_path)
+                # Merge PDFs (CPU/disk heavy - run off the event loop)
+                success = await asyncio.to_thread(
+                    self._merge_pdf_files, input_files, output_path
+                )
                 
                 if not success:
                     return self.create_response(
@@ -153,17 +162,29 @@ class PDFMergeService(BasePDFMicroservice):
         Returns:
             bool: True if successful, False otherwise
         """
+        open_inputs = []
         try:
             writer = PdfWriter()
-            
+
+            # Cache readers so a file repeated in the merge list (e.g. a
+            # cover sheet between documents) is only parsed once
+            readers = {}
+
             for file_path in input_files:
                 self.logger.info(f"Processing: {os.path.basename(file_path)}")
-                
-                reader = PdfReader(file_path)
-                
-                # Add all pages from this PDF
-                for page_num in range(len(reader.pages)):
-                    writer.add_page(reader.pages[page_num])
+
+                reader = readers.get(file_path)
+                if reader is None:
+                    # Feed PyPDF2 a memory map so the kernel pages data
+                    # in lazily instead of buffering whole files
+                    f = open(file_path, "rb")
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    open_inputs.append((mapped, f))
+                    reader = readers[file_path] = PdfReader(mapped)
+
+                # Bulk-copy all pages in one call instead of an indexed
+                # per-page loop through pages.__getitem__
+                writer.append_pages_from_reader(reader)
             
             # Write merged PDF
             with open(output_path, "wb") as output_file:
@@ -175,6 +196,10 @@ class PDFMergeService(BasePDFMicroservice):
         except Exception as e:
             self.logger.error(f"Error merging PDFs: {str(e)}")
             return False
+        finally:
+            for mapped, f in open_inputs:
+                mapped.close()
+                f.close()
 
 
 def create_merge_service(**kwargs):
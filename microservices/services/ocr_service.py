@@ -3,14 +3,25 @@ PDF OCR Microservice
 Handles optical character recognition (text extraction) from PDF files.
 """
 import os
+import re
 import sys
 import time
 import json
+import uuid
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, List
 
 import fitz  # PyMuPDF
 from PIL import Image
+
+try:
+    import orjson  # Rust-backed encoder, much faster on large results
+except ImportError:
+    orjson = None
 import io
 from fastapi import HTTPException, UploadFile, File, Form
 from fastapi.responses import FileResponse
@@ -48,12 +59,41 @@ class PDFOCRService(BasePDFMicroservice):
         ):
             """Process PDF file - perform OCR."""
             try:
-                # Save uploaded file
-                input_path = Path(self.upload_dir) / file.filename
-                with open(input_path, "wb") as f:
-                    content = await file.read()
-                    f.write(content)
-                
+                # Stream the upload to disk, hashing as we go. Naming the
+                # saved file by content hash sanitizes the user-controlled
+                # filename and lets identical PDFs share one OCR result.
+                hasher = hashlib.sha256()
+                tmp_path = self.upload_path / f"upload_{uuid.uuid4().hex}.tmp"
+                with open(tmp_path, "wb") as f:
+                    while chunk := await file.read(1024 * 1024):
+                        hasher.update(chunk)
+                        f.write(chunk)
+
+                digest = hasher.hexdigest()
+                input_path = self.upload_path / f"{digest}.pdf"
+                os.replace(tmp_path, input_path)
+
+                if output_format == "json":
+                    media_type = "application/json"
+                    output_ext = "json"
+                else:
+                    media_type = "text/plain"
+                    output_ext = "txt"
+
+                # Reuse a previous OCR run of the same content/settings.
+                # Engine/language are user-supplied Form fields - reduce
+                # them to safe slugs before using them as path segments
+                engine_slug = re.sub(r"[^A-Za-z0-9_-]", "", engine) or "engine"
+                language_slug = re.sub(r"[^A-Za-z0-9_-]", "", language) or "lang"
+                output_path = self.output_path / f"ocr_{digest}_{engine_slug}_{language_slug}.{output_ext}"
+                if output_path.exists():
+                    self.logger.info(f"OCR cache hit for {file.filename} ({digest[:12]})")
+                    return FileResponse(
+                        path=str(output_path),
+                        media_type=media_type,
+                        filename=output_path.name
+                    )
+
                 # Perform OCR
                 ocr_result = await self._perform_ocr_on_pdf(
                     str(input_path),
@@ -61,30 +101,14 @@ class PDFOCRService(BasePDFMicroservice):
                     engine,
                     output_format
                 )
-                
+
                 if not ocr_result:
                     raise HTTPException(status_code=500, detail="Failed to perform OCR on PDF")
-                
-                # Save results
-                if output_format == "json":
-                    output_filename = f"ocr_{Path(file.filename).stem}.json"
-                    output_path = Path(get_unique_filename(output_filename, str(self.output_dir)))
-                    
-                    with open(output_path, "w", encoding="utf-8") as f:
-                        json.dump(ocr_result, f, indent=2, ensure_ascii=False)
-                    media_type = "application/json"
-                else:
-                    output_filename = f"ocr_{Path(file.filename).stem}.txt"
-                    output_path = Path(get_unique_filename(output_filename, str(self.output_dir)))
-                    
-                    with open(output_path, "w", encoding="utf-8") as f:
-                        if isinstance(ocr_result, dict):
-                            for page_data in ocr_result.get("pages", []):
-                                f.write(f"Page {page_data.get('page_number', '?')}:\n")
-                                f.write(page_data.get("text", "") + "\n\n")
-                        else:
-                            f.write(str(ocr_result))
-                    media_type = "text/plain"
+
+                # Save results (written off the event loop - results can be multi-MB)
+                await asyncio.to_thread(
+                    self._write_results, str(output_path), ocr_result, output_format
+                )
                 
                 # Return the OCR result file
                 return FileResponse(
@@ -104,7 +128,7 @@ class PDFOCRService(BasePDFMicroservice):
             
             try:
                 # Validate file exists
-                input_path = Path(self.upload_dir) / request.file_name
+                input_path = self.upload_path / request.file_name
                 if not input_path.exists():
                     raise HTTPException(status_code=404, detail=f"File {request.file_name} not found")
                 
@@ -119,25 +143,17 @@ class PDFOCRService(BasePDFMicroservice):
                 if not ocr_result:
                     raise HTTPException(status_code=500, detail="Failed to perform OCR on PDF")
                 
-                # Save results
+                # Save results (written off the event loop - results can be multi-MB)
                 if request.output_format == "json":
                     output_filename = f"ocr_{Path(request.file_name).stem}.json"
-                    output_path = Path(get_unique_filename(output_filename, str(self.output_dir)))
-                    
-                    with open(output_path, "w", encoding="utf-8") as f:
-                        json.dump(ocr_result, f, indent=2, ensure_ascii=False)
+                    output_path = Path(get_unique_filename(output_filename, self.output_dir))
                 else:
                     output_filename = f"ocr_{Path(request.file_name).stem}.txt"
-                    output_path = Path(get_unique_filename(output_filename, str(self.output_dir)))
-                    
-                    with open(output_path, "w", encoding="utf-8") as f:
-                        if isinstance(ocr_result, dict):
-                            # If JSON format requested but saved as TXT, extract text
-                            for page_data in ocr_result.get("pages", []):
-                                f.write(f"Page {page_data.get('page_number', '?')}:\n")
-                                f.write(page_data.get("text", "") + "\n\n")
-                        else:
-                            f.write(str(ocr_result))
+                    output_path = Path(get_unique_filename(output_filename, self.output_dir))
+
+                await asyncio.to_thread(
+                    self._write_results, str(output_path), ocr_result, request.output_format
+                )
                 
                 # Calculate processing time
                 processing_time = (time.time() - start_time) * 1000
@@ -188,6 +204,39 @@ class PDFOCRService(BasePDFMicroservice):
     def _get_service_endpoints(self) -> list:
         """Get service-specific endpoints."""
         return ["/ocr", "/process"]
+
+    def _write_results(self, output_path: str, ocr_result, output_format: str) -> None:
+        """Write OCR results to disk (blocking - call via asyncio.to_thread).
+
+        Writes to a temporary name and renames into place, so a failed
+        or interrupted write can never leave a truncated file at the
+        final name - which doubles as the result cache key.
+        """
+        tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            if output_format == "json":
+                if orjson is not None:
+                    with open(tmp_path, "wb") as f:
+                        f.write(orjson.dumps(ocr_result, option=orjson.OPT_INDENT_2))
+                else:
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(ocr_result, f, indent=2, ensure_ascii=False)
+            else:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    if isinstance(ocr_result, dict):
+                        # If JSON format requested but saved as TXT, extract text
+                        for page_data in ocr_result.get("pages", []):
+                            f.write(f"Page {page_data.get('page_number', '?')}:\n")
+                            f.write(page_data.get("text", "") + "\n\n")
+                    else:
+                        f.write(str(ocr_result))
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
     
     def _check_tesseract_available(self) -> bool:
         """Check if Tesseract is installed and available."""
@@ -198,6 +247,14 @@ class PDFOCRService(BasePDFMicroservice):
         except Exception:
             return False
     
+    def _check_tesserocr_available(self) -> bool:
+        """Check if tesserocr (C API bindings) is available."""
+        try:
+            import tesserocr  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
     def _check_easyocr_available(self) -> bool:
         """Check if EasyOCR is available."""
         try:
@@ -223,23 +280,113 @@ class PDFOCRService(BasePDFMicroservice):
             self.logger.error(f"Tesseract OCR error: {str(e)}")
             return None
     
+    def _render_page(self, pdf_document, page_num: int, matrix) -> bytes:
+        """Rasterize a single PDF page to PNG bytes."""
+        return pdf_document[page_num].get_pixmap(matrix=matrix).tobytes("png")
+
+    def _perform_ocr_tesserocr_parallel(self, images: List[bytes], language: str) -> List[Optional[str]]:
+        """
+        OCR rendered page images in parallel threads using tesserocr.
+
+        Tesseract releases the GIL inside native code under tesserocr, so
+        a thread pool scales across cores without the process-spawn and
+        pickling costs of a process pool. PyTessBaseAPI is not
+        thread-safe, so each worker thread keeps its own instance.
+        """
+        import tesserocr
+
+        thread_state = threading.local()
+
+        def ocr_page(img_data):
+            try:
+                api = getattr(thread_state, "api", None)
+                if api is None:
+                    api = thread_state.api = tesserocr.PyTessBaseAPI(lang=language)
+                api.SetImage(Image.open(io.BytesIO(img_data)))
+                return api.GetUTF8Text()
+            except Exception as e:
+                self.logger.error(f"tesserocr OCR error: {str(e)}")
+                return None
+
+        max_workers = min(len(images), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(ocr_page, images))
+
+    def _get_easyocr_reader(self, language: str):
+        """Get a cached EasyOCR reader for a language (model load is expensive)."""
+        readers = getattr(self, "_easyocr_readers", None)
+        if readers is None:
+            readers = self._easyocr_readers = {}
+        reader = readers.get(language)
+        if reader is None:
+            import easyocr
+            # Reader will use GPU if available
+            reader = easyocr.Reader([language])
+            self._quantize_easyocr_reader(reader)
+            readers[language] = reader
+        return reader
+
+    def _quantize_easyocr_reader(self, reader) -> None:
+        """
+        Dynamically quantize EasyOCR models to int8 for CPU inference.
+
+        FP32 inference on CPU is bandwidth-bound; int8 weights halve the
+        bytes moved and use VNNI dot-product instructions where the CPU
+        has them. Skipped when a GPU will run the models instead.
+        """
+        try:
+            import torch
+
+            if torch.cuda.is_available():
+                return
+
+            for attr in ("detector", "recognizer"):
+                model = getattr(reader, attr, None)
+                if isinstance(model, torch.nn.Module):
+                    quantized = torch.ao.quantization.quantize_dynamic(
+                        model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8
+                    )
+                    setattr(reader, attr, quantized)
+        except Exception as e:
+            self.logger.warning(f"EasyOCR quantization skipped: {str(e)}")
+
+    def _perform_ocr_easyocr_batched(self, images: List[bytes], language: str) -> List[Optional[str]]:
+        """
+        OCR all page images through a single batched EasyOCR call.
+
+        On GPU, readtext_batched amortizes the kernel-launch and
+        host-device transfer costs that dominate per-page readtext calls.
+        Falls back to per-page OCR if batching fails.
+        """
+        try:
+            import numpy as np
+
+            reader = self._get_easyocr_reader(language)
+            arrays = [np.array(Image.open(io.BytesIO(img))) for img in images]
+            batched = reader.readtext_batched(arrays, batch_size=8)
+            return [
+                " ".join(item[1] for item in page_results)
+                for page_results in batched
+            ]
+        except Exception as e:
+            self.logger.error(f"EasyOCR batch error: {str(e)}; falling back to per-page OCR")
+            return [self._perform_ocr_easyocr(img, language) for img in images]
+
     def _perform_ocr_easyocr(self, image, language: str = "en") -> Optional[str]:
         """Perform OCR using EasyOCR (GPU-capable)."""
         try:
-            import easyocr
             from PIL import Image
             import numpy as np
-            
+
             # Convert to numpy array if needed
             if isinstance(image, Image.Image):
                 image_array = np.array(image)
             else:
                 pil_image = Image.open(io.BytesIO(image))
                 image_array = np.array(pil_image)
-            
-            # Initialize reader (will use GPU if available)
-            reader = easyocr.Reader([language])
-            
+
+            reader = self._get_easyocr_reader(language)
+
             # Perform OCR
             results = reader.readtext(image_array)
             
@@ -267,13 +414,20 @@ class PDFOCRService(BasePDFMicroservice):
         """
         try:
             # Check engine availability
-            if engine == "tesseract" and not self._check_tesseract_available():
+            use_tesserocr = engine == "tesseract" and self._check_tesserocr_available()
+            if engine == "tesseract" and not use_tesserocr and not self._check_tesseract_available():
                 raise Exception("Tesseract not available. Please install tesseract-ocr.")
             elif engine == "easyocr" and not self._check_easyocr_available():
                 raise Exception("EasyOCR not available. Please install easyocr package.")
             
             # Open PDF
             pdf_document = fitz.open(pdf_path)
+
+            # Hoist loop invariants: render matrix and engine-specific
+            # language codes are the same for every page
+            ocr_matrix = fitz.Matrix(2, 2)  # 2x scaling for better OCR
+            tesseract_lang = "eng" if language in ("en", "eng") else language
+            easyocr_lang = "en" if language in ("eng", "en") else language
             
             if output_format == "json":
                 results = {
@@ -282,26 +436,51 @@ class PDFOCRService(BasePDFMicroservice):
                     "total_pages": pdf_document.page_count
                 }
             else:
-                results = ""
+                # Collect page fragments and join once at the end -
+                # repeated string += is quadratic in total text length
+                text_parts = []
             
-            # Process each page
-            for page_num in range(pdf_document.page_count):
-                page = pdf_document[page_num]
-                
-                # Convert page to image
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x scaling for better OCR
-                img_data = pix.tobytes("png")
-                
-                # Perform OCR
-                if engine == "tesseract":
-                    # Convert language code (tesseract uses different codes)
-                    tesseract_lang = "eng" if language in ["en", "eng"] else language
-                    text = self._perform_ocr_tesseract(img_data)
-                else:  # easyocr
-                    # Convert language code (easyocr uses different codes)
-                    easyocr_lang = "en" if language in ["eng", "en"] else language
-                    text = self._perform_ocr_easyocr(img_data, easyocr_lang)
-                
+            page_count = pdf_document.page_count
+
+            # With tesserocr available, render all pages up front and OCR
+            # them across a thread pool (the GIL is released inside
+            # Tesseract, so pages run truly in parallel)
+            if use_tesserocr:
+                images = [
+                    self._render_page(pdf_document, page_num, ocr_matrix)
+                    for page_num in range(page_count)
+                ]
+                page_texts = self._perform_ocr_tesserocr_parallel(images, tesseract_lang)
+            elif engine == "easyocr":
+                # Batch all pages into one EasyOCR call so the GPU (when
+                # present) runs saturated instead of per-page
+                images = [
+                    self._render_page(pdf_document, page_num, ocr_matrix)
+                    for page_num in range(page_count)
+                ]
+                page_texts = self._perform_ocr_easyocr_batched(images, easyocr_lang)
+            else:
+                # Pipeline: pre-render page N+1 in a background thread
+                # while page N is being OCRed, hiding MuPDF render time
+                # behind OCR latency
+                page_texts = []
+                with ThreadPoolExecutor(max_workers=1) as render_pool:
+                    next_render = None
+                    if page_count:
+                        next_render = render_pool.submit(
+                            self._render_page, pdf_document, 0, ocr_matrix
+                        )
+                    for page_num in range(page_count):
+                        img_data = next_render.result()
+                        if page_num + 1 < page_count:
+                            next_render = render_pool.submit(
+                                self._render_page, pdf_document, page_num + 1, ocr_matrix
+                            )
+
+                        page_texts.append(self._perform_ocr_tesseract(img_data))
+
+            # Assemble results per page
+            for page_num, text in enumerate(page_texts):
                 if text is None:
                     text = f"[OCR failed for page {page_num + 1}]"
                 
@@ -313,9 +492,11 @@ class PDFOCRService(BasePDFMicroservice):
                         "character_count": len(text.strip())
                     })
                 else:
-                    results += f"Page {page_num + 1}:\n{text.strip()}\n\n"
-            
+                    text_parts.append(f"Page {page_num + 1}:\n{text.strip()}\n\n")
+
             pdf_document.close()
+            if output_format != "json":
+                results = "".join(text_parts)
             return results
             
         except Exception as e:
@@ -5,7 +5,10 @@ Handles adding and removing password protection from PDF files.
 import os
 import sys
 import time
+import shutil
+import asyncio
 import zipfile
+import subprocess
 from pathlib import Path
 from typing import Optional
 
@@ -23,6 +26,26 @@ from microservices.common.models import (
 )
 from utils.file_ops import get_unique_filename, get_file_size_mb
 
+# Opt-in: route protect/unlock through the qpdf CLI (OpenSSL AES-NI)
+# when the binary is on PATH; pikepdf remains the fallback
+_USE_QPDF_CLI = os.environ.get("USE_QPDF_CLI", "").lower() in ("1", "true", "yes")
+
+# All four (allow_printing, allow_modification) permission combinations,
+# built once at import instead of per protect call
+_PERMISSIONS = {
+    (printing, modification): pikepdf.Permissions(
+        print_lowres=printing,
+        print_highres=printing,
+        modify_annotation=modification,
+        modify_form=modification,
+        modify_other=modification,
+        extract=True,  # Always allow text extraction
+        accessibility=True  # Always allow accessibility
+    )
+    for printing in (False, True)
+    for modification in (False, True)
+}
+
 
 class PDFProtectService(BasePDFMicroservice):
     """PDF Protection/Unlock microservice."""
@@ -49,14 +72,13 @@ class PDFProtectService(BasePDFMicroservice):
                 # Save uploaded file
                 input_path = Path(self.upload_dir) / file.filename
                 with open(input_path, "wb") as f:
-                    content = await file.read()
-                    f.write(content)
+                    # Stream in 1 MiB chunks - keeps per-request memory
+                    # constant instead of O(file size)
+                    while chunk := await file.read(1024 * 1024):
+                        f.write(chunk)
                 
                 # Check if file is already encrypted
-                try:
-                    with pikepdf.open(input_path) as test_pdf:
-                        pass  # File is not encrypted
-                except pikepdf.PasswordError:
+                if self._is_encrypted(str(input_path)):
                     raise HTTPException(status_code=400, detail="PDF is already password-protected")
                 
                 # Generate output filename
@@ -64,14 +86,19 @@ class PDFProtectService(BasePDFMicroservice):
                 output_path = Path(get_unique_filename(output_filename, str(self.output_dir)))
                 
                 # Protect PDF
-                success = await self._protect_pdf_file(
-                    str(input_path),
-                    str(output_path),
-                    user_password,
-                    owner_password,
-                    allow_printing=True,
-                    allow_modification=False
-                )
+                try:
+                    success = await asyncio.to_thread(
+                        self._protect_pdf_file,
+                        str(input_path),
+                        str(output_path),
+                        user_password,
+                        owner_password,
+                        True,
+                        False
+                    )
+                except pikepdf.PasswordError:
+                    # Encrypted input that slipped past the tail probe
+                    raise HTTPException(status_code=400, detail="PDF is already password-protected")
                 
                 if not success:
                     raise HTTPException(status_code=500, detail="Failed to protect PDF")
@@ -83,6 +110,8 @@ class PDFProtectService(BasePDFMicroservice):
                     filename=output_path.name
                 )
                 
+            except HTTPException:
+                raise
             except Exception as e:
                 self.logger.error(f"Process error: {str(e)}")
                 raise HTTPException(status_code=500, detail=str(e))
@@ -99,10 +128,7 @@ class PDFProtectService(BasePDFMicroservice):
                     raise HTTPException(status_code=404, detail=f"File {request.file_name} not found")
                 
                 # Check if file is already encrypted
-                try:
-                    with pikepdf.open(input_path) as test_pdf:
-                        pass  # File is not encrypted
-                except pikepdf.PasswordError:
+                if self._is_encrypted(str(input_path)):
                     raise HTTPException(status_code=400, detail="PDF is already password-protected")
                 
                 # Generate output filename
@@ -110,14 +136,19 @@ class PDFProtectService(BasePDFMicroservice):
                 output_path = Path(get_unique_filename(output_filename, str(self.output_dir)))
                 
                 # Protect PDF
-                success = await self._protect_pdf_file(
-                    str(input_path),
-                    str(output_path),
-                    request.user_password,
-                    request.owner_password,
-                    request.allow_printing,
-                    request.allow_modification
-                )
+                try:
+                    success = await asyncio.to_thread(
+                        self._protect_pdf_file,
+                        str(input_path),
+                        str(output_path),
+                        request.user_password,
+                        request.owner_password,
+                        request.allow_printing,
+                        request.allow_modification
+                    )
+                except pikepdf.PasswordError:
+                    # Encrypted input that slipped past the tail probe
+                    raise HTTPException(status_code=400, detail="PDF is already password-protected")
                 
                 if not success:
                     raise HTTPException(status_code=500, detail="Failed to protect PDF")
@@ -173,7 +204,8 @@ class PDFProtectService(BasePDFMicroservice):
                 output_path = Path(get_unique_filename(output_filename, str(self.output_dir)))
                 
                 # Unlock PDF
-                success = await self._unlock_pdf_file(
+                success = await asyncio.to_thread(
+                    self._unlock_pdf_file,
                     str(input_path),
                     str(output_path),
                     request.password
@@ -218,10 +250,80 @@ class PDFProtectService(BasePDFMicroservice):
     def _get_service_endpoints(self) -> list:
         """Get service-specific endpoints."""
         return ["/protect", "/unlock", "/process"]
-    
-    async def _protect_pdf_file(self, input_path: str, output_path: str, 
-                               user_password: str, owner_password: Optional[str],
-                               allow_printing: bool, allow_modification: bool) -> bool:
+
+    def _qpdf_encrypt(self, input_path: str, output_path: str,
+                      user_password: str, owner_password: Optional[str],
+                      allow_printing: bool, allow_modification: bool) -> bool:
+        """Encrypt via the qpdf CLI; returns False if qpdf is unusable."""
+        if shutil.which("qpdf") is None:
+            return False
+        try:
+            result = subprocess.run(
+                [
+                    "qpdf", "--encrypt",
+                    user_password, owner_password or user_password, "256",
+                    "--print=full" if allow_printing else "--print=none",
+                    "--modify=all" if allow_modification else "--modify=none",
+                    "--", input_path, output_path
+                ],
+                capture_output=True
+            )
+            if result.returncode == 0:
+                return True
+            self.logger.warning(
+                f"qpdf encrypt failed (rc={result.returncode}); falling back to pikepdf"
+            )
+        except OSError as e:
+            self.logger.warning(f"qpdf encrypt unavailable: {str(e)}")
+        return False
+
+    def _qpdf_decrypt(self, input_path: str, output_path: str, password: str) -> bool:
+        """Decrypt via the qpdf CLI; returns False if qpdf is unusable."""
+        if shutil.which("qpdf") is None:
+            return False
+        try:
+            result = subprocess.run(
+                ["qpdf", f"--password={password}", "--decrypt",
+                 input_path, output_path],
+                capture_output=True
+            )
+            if result.returncode == 0:
+                return True
+        except OSError as e:
+            self.logger.warning(f"qpdf decrypt unavailable: {str(e)}")
+        return False
+
+    def _is_encrypted(self, input_path: str) -> bool:
+        """
+        Cheap encryption probe: scan the file tail for an /Encrypt entry.
+
+        This is a fast path, not an oracle: a positive substring hit is
+        only a hint (string objects or XMP metadata near EOF can contain
+        the same bytes), so it is confirmed with a real pikepdf open
+        before the file is rejected, and an /Encrypt that sits outside
+        the tail window (large xref streams) is missed here but still
+        surfaces as pikepdf.PasswordError from _protect_pdf_file.
+        """
+        try:
+            with open(input_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - 4096))
+                tail = f.read()
+            if b"/Encrypt" not in tail:
+                return False
+        except OSError:
+            pass
+
+        try:
+            with pikepdf.open(input_path):
+                return False
+        except pikepdf.PasswordError:
+            return True
+
+    def _protect_pdf_file(self, input_path: str, output_path: str,
+                          user_password: str, owner_password: Optional[str],
+                          allow_printing: bool, allow_modification: bool) -> bool:
         """
         Add password protection to a PDF file.
         
@@ -236,38 +338,47 @@ class PDFProtectService(BasePDFMicroservice):
         Returns:
             bool: True if successful, False otherwise
         """
+        if _USE_QPDF_CLI and self._qpdf_encrypt(input_path, output_path,
+                                                user_password, owner_password,
+                                                allow_printing, allow_modification):
+            return True
+
         try:
             with pikepdf.open(input_path) as pdf:
-                # Set permissions
-                permissions = pikepdf.Permissions(
-                    print_lowres=allow_printing,
-                    print_highres=allow_printing,
-                    modify_annotation=allow_modification,
-                    modify_form=allow_modification,
-                    modify_other=allow_modification,
-                    extract=True,  # Always allow text extraction
-                    accessibility=True  # Always allow accessibility
-                )
+                # Look up the precomputed permission set
+                permissions = _PERMISSIONS[(allow_printing, allow_modification)]
                 
-                # Prepare encryption settings
+                # Prepare encryption settings - always pass the
+                # precomputed permission set so the output profile is
+                # deterministic for every flag combination
                 encryption_kwargs = {
                     "owner": owner_password if owner_password else user_password,
                     "user": user_password,
+                    "allow": permissions,
                 }
                 
-                if allow_printing or allow_modification:
-                    encryption_kwargs["allow"] = permissions
-                
-                # Save with encryption
-                pdf.save(output_path, encryption=pikepdf.Encryption(**encryption_kwargs))
+                # Save with encryption: generate object streams (fewer
+                # bytes through AES) and skip linearization, which is a
+                # web-delivery layout pass this flow never needs
+                pdf.save(
+                    output_path,
+                    encryption=pikepdf.Encryption(**encryption_kwargs),
+                    object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                    linearize=False,
+                    compress_streams=True
+                )
             
             return True
             
+        except pikepdf.PasswordError:
+            # Already-encrypted input the tail probe missed; the
+            # handlers turn this into the 400 response
+            raise
         except Exception as e:
             self.logger.error(f"Error protecting PDF: {str(e)}")
             return False
     
-    async def _unlock_pdf_file(self, input_path: str, output_path: str, password: str) -> bool:
+    def _unlock_pdf_file(self, input_path: str, output_path: str, password: str) -> bool:
         """
         Remove password protection from a PDF file.
         
@@ -279,10 +390,21 @@ class PDFProtectService(BasePDFMicroservice):
         Returns:
             bool: True if successful, False otherwise
         """
+        if _USE_QPDF_CLI and self._qpdf_decrypt(input_path, output_path, password):
+            return True
+
         try:
             with pikepdf.open(input_path, password=password) as pdf:
-                pdf.save(output_path)
-            
+                # Unlock only needs to drop /Encrypt and rewrite the
+                # xref - keep existing object streams and don't
+                # re-deflate content streams that are already compressed
+                pdf.save(
+                    output_path,
+                    encryption=False,
+                    object_stream_mode=pikepdf.ObjectStreamMode.preserve,
+                    compress_streams=False
+                )
+
             return True
             
         except pikepdf.PasswordError:
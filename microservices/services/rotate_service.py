@@ -1,11 +1,12 @@
 """PDF Rotate Microservice."""
 import os
 import time
+import asyncio
 from pathlib import Path
 from typing import List, Optional
+import pikepdf
 from fastapi import HTTPException, UploadFile, File, Form
 from fastapi.responses import FileResponse
-from PyPDF2 import PdfReader, PdfWriter
 
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,6 +17,25 @@ from common import (
 )
 
 
+def _make_rotator(angle: int):
+    """Build a rotation loop with the angle captured as a constant."""
+    def rotate_pages(pdf, mask) -> None:
+        if mask is None:
+            for page in pdf.pages:
+                page.rotate(angle, relative=True)
+        else:
+            for page_num, page in enumerate(pdf.pages):
+                if mask[page_num]:
+                    page.rotate(angle, relative=True)
+    return rotate_pages
+
+
+# Specialized loops for the three legal angles, built once at import -
+# no per-iteration angle marshaling and no selection branch in the
+# all-pages case
+_ROTATE_FNS = {angle: _make_rotator(angle) for angle in (90, 180, 270)}
+
+
 class PDFRotateService(BasePDFMicroservice):
     """Microservice for rotating PDF pages."""
     
@@ -48,44 +68,55 @@ class PDFRotateService(BasePDFMicroservice):
                 
                 # Save uploaded file
                 input_path = Path(self.upload_dir) / file.filename
-                with open(input_path, "wb") as f:
-                    content = await file.read()
-                    f.write(content)
-                
-                # Get PDF info
-                reader = PdfReader(str(input_path))
-                total_pages = len(reader.pages)
+                with open(input_path, "wb", buffering=1024 * 1024) as f:
+                    # Stream in 1 MiB chunks - keeps per-request memory
+                    # constant instead of O(file size)
+                    while chunk := await file.read(1024 * 1024):
+                        f.write(chunk)
                 
-                # Parse page selection
-                pages_to_rotate = None
-                if pages:
-                    pages_to_rotate = parse_page_range(pages, total_pages)
-                    if pages_to_rotate is None:
-                        raise HTTPException(
-                            status_code=400,
-                            detail="Invalid page range specified"
-                        )
-                
-                # Create output file path
-                output_filename = f"rotated_{file.filename}"
-                output_path = Path(get_unique_filename(output_filename, self.output_dir))
-                
-                # Rotate PDF
-                success = self._rotate_pdf(
-                    str(input_path), 
-                    str(output_path), 
-                    rotation, 
-                    pages_to_rotate
-                )
+                # Open once and reuse the handle for both the page
+                # count and the rotation itself
+                pdf = await asyncio.to_thread(pikepdf.open, str(input_path))
+                try:
+                    total_pages = len(pdf.pages)
+
+                    # Parse page selection
+                    pages_to_rotate = None
+                    if pages:
+                        pages_to_rotate = parse_page_range(pages, total_pages)
+                        if pages_to_rotate is None:
+                            raise HTTPException(
+                                status_code=400,
+                                detail="Invalid page range specified"
+                            )
+
+                    # Create output file path
+                    output_filename = f"rotated_{file.filename}"
+                    output_path = Path(get_unique_filename(output_filename, self.output_dir))
+
+                    # Rotate PDF
+                    success = await asyncio.to_thread(
+                        self._rotate_pdf,
+                        str(input_path),
+                        str(output_path),
+                        rotation,
+                        pages_to_rotate,
+                        pdf
+                    )
+                finally:
+                    pdf.close()
                 
                 if not success:
                     raise HTTPException(status_code=500, detail="Failed to rotate PDF")
                 
-                # Return the rotated file
+                # Return the rotated file - pass the stat result so
+                # Starlette can sendfile without re-statting
+                stat_result = output_path.stat()
                 return FileResponse(
                     path=str(output_path),
                     media_type="application/pdf",
-                    filename=output_path.name
+                    filename=output_path.name,
+                    stat_result=stat_result
                 )
                 
             except Exception as e:
@@ -113,34 +144,40 @@ class PDFRotateService(BasePDFMicroservice):
                         detail="Rotation angle must be 90, 180, or 270 degrees"
                     )
                 
-                # Get PDF info
-                reader = PdfReader(input_path)
-                total_pages = len(reader.pages)
-                input_size = self.get_file_size_mb(input_path)
-                
-                # Parse page selection
-                pages_to_rotate = None
-                if request.pages:
-                    pages_to_rotate = parse_page_range(request.pages, total_pages)
-                    if pages_to_rotate is None:
-                        raise HTTPException(
-                            status_code=400,
-                            detail="Invalid page range specified"
-                        )
-                
-                self.logger.info(f"Rotating PDF: {request.file_name} ({total_pages} pages, {input_size:.2f} MB)")
-                
-                # Create output file path
-                output_filename = f"rotated_{request.file_name}"
-                output_path = get_unique_filename(output_filename, self.output_dir)
-                
-                # Rotate PDF
-                success = self._rotate_pdf(
-                    input_path, 
-                    output_path, 
-                    request.rotation_angle, 
-                    pages_to_rotate
-                )
+                # Open once and reuse the handle for both the page
+                # count and the rotation itself
+                pdf = await asyncio.to_thread(pikepdf.open, input_path)
+                try:
+                    total_pages = len(pdf.pages)
+                    input_size = self.get_file_size_mb(input_path)
+
+                    # Parse page selection
+                    pages_to_rotate = None
+                    if request.pages:
+                        pages_to_rotate = parse_page_range(request.pages, total_pages)
+                        if pages_to_rotate is None:
+                            raise HTTPException(
+                                status_code=400,
+                                detail="Invalid page range specified"
+                            )
+
+                    self.logger.info(f"Rotating PDF: {request.file_name} ({total_pages} pages, {input_size:.2f} MB)")
+
+                    # Create output file path
+                    output_filename = f"rotated_{request.file_name}"
+                    output_path = get_unique_filename(output_filename, self.output_dir)
+
+                    # Rotate PDF
+                    success = await asyncio.to_thread(
+                        self._rotate_pdf,
+                        input_path,
+                        output_path,
+                        request.rotation_angle,
+                        pages_to_rotate,
+                        pdf
+                    )
+                finally:
+                    pdf.close()
                 
                 if not success:
                     return self.create_response(
@@ -188,41 +225,56 @@ class PDFRotateService(BasePDFMicroservice):
         return ["/rotate", "/process"]
     
     def _rotate_pdf(
-        self, 
-        input_path: str, 
-        output_path: str, 
-        rotation: int, 
-        pages: Optional[List[int]] = None
+        self,
+        input_path: str,
+        output_path: str,
+        rotation: int,
+        pages: Optional[List[int]] = None,
+        pdf: Optional[pikepdf.Pdf] = None
     ) -> bool:
         """
         Rotate pages in a PDF file.
-        
+
         Args:
             input_path: Path to input PDF
             output_path: Path to save rotated PDF
             rotation: Rotation angle (90, 180, 270)
             pages: List of page indices to rotate (0-indexed), None for all pages
-        
+            pdf: Already-open pikepdf document to reuse (avoids a second parse)
+
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            reader = PdfReader(input_path)
-            writer = PdfWriter()
-            total_pages = len(reader.pages)
-            
-            for page_num in range(total_pages):
-                page = reader.pages[page_num]
-                
-                # Rotate page if it's in the selection (or all pages if pages is None)
-                if pages is None or page_num in pages:
-                    page.rotate(rotation)
-                
-                writer.add_page(page)
-            
-            with open(output_path, "wb") as output_file:
-                writer.write(output_file)
-            
+            # pikepdf rotation is a /Rotate key mutation on the page
+            # dict - no Python-level re-parse of content streams
+            owns_pdf = pdf is None
+            if owns_pdf:
+                pdf = pikepdf.open(input_path)
+            try:
+                # Byte mask instead of `page_num in pages` - the list
+                # scan was O(pages) per page, O(N*M) over the document
+                mask = None
+                if pages is not None:
+                    mask = bytearray(len(pdf.pages))
+                    for page_num in pages:
+                        mask[page_num] = 1
+
+                rotate_pages = _ROTATE_FNS.get(rotation) or _make_rotator(rotation)
+                rotate_pages(pdf, mask)
+
+                if mask is None:
+                    # Whole-document rotation only touches the /Rotate
+                    # integers - keep the existing object streams rather
+                    # than rebuilding them, making the save O(metadata)
+                    pdf.save(output_path, linearize=False,
+                             object_stream_mode=pikepdf.ObjectStreamMode.preserve)
+                else:
+                    pdf.save(output_path, linearize=False)
+            finally:
+                if owns_pdf:
+                    pdf.close()
+
             return True
             
         except Exception as e:
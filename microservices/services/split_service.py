@@ -1,12 +1,18 @@
 """PDF Split Microservice."""
+import io
 import os
+import re
 import time
+import shutil
+import asyncio
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from typing import List, Optional
 from pathlib import Path
+import pikepdf
 from fastapi import HTTPException, UploadFile, File, Form
 from fastapi.responses import FileResponse
-from PyPDF2 import PdfReader, PdfWriter
 
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -17,6 +23,27 @@ from common import (
 )
 
 
+# Whole-selection syntax check, then per-part extraction - both run as
+# C-level regex scans instead of branchy split/strip/int parsing
+_RANGES_SYNTAX_RE = re.compile(r"^\s*\d+\s*(?:-\s*\d+)?\s*(?:,\s*\d+\s*(?:-\s*\d+)?\s*)*$")
+_RANGE_PART_RE = re.compile(r"(\d+)\s*(?:-\s*(\d+))?")
+
+
+def _write_single_page(input_path: str, page_num: int, output_path: str) -> str:
+    """
+    Write one page of a PDF to its own file.
+
+    Top-level function so it can be pickled into a ProcessPoolExecutor;
+    each worker opens the source PDF itself rather than sharing a
+    non-picklable handle.
+    """
+    with pikepdf.open(input_path) as src:
+        with pikepdf.Pdf.new() as dst:
+            dst.pages.append(src.pages[page_num])
+            dst.save(output_path, linearize=False)
+    return output_path
+
+
 class PDFSplitService(BasePDFMicroservice):
     """Microservice for splitting PDF files."""
     
@@ -42,52 +69,53 @@ class PDFSplitService(BasePDFMicroservice):
             try:
                 # Save uploaded file
                 input_path = Path(self.upload_dir) / file.filename
-                with open(input_path, "wb") as f:
-                    content = await file.read()
-                    f.write(content)
+                with open(input_path, "wb", buffering=1024 * 1024) as f:
+                    # Stream in 1 MiB chunks - keeps per-request memory
+                    # constant instead of O(file size)
+                    while chunk := await file.read(1024 * 1024):
+                        f.write(chunk)
                 
-                # Get PDF info
-                reader = PdfReader(str(input_path))
-                total_pages = len(reader.pages)
-                
-                # Parse split configuration
-                if split_type == "each":
-                    # Split each page into separate file
-                    output_files = self._split_by_pages(str(input_path), total_pages)
-                elif split_type == "pages" and pages:
-                    # Extract specific pages
-                    ranges = self._parse_split_ranges(pages, total_pages)
-                    if not ranges:
-                        raise HTTPException(status_code=400, detail="Invalid page specification")
-                    output_files = self._split_by_ranges(str(input_path), ranges)
-                elif split_type == "range" and pages:
-                    # Split by page ranges
-                    ranges = self._parse_split_ranges(pages, total_pages)
-                    if not ranges:
-                        raise HTTPException(status_code=400, detail="Invalid page ranges specified")
-                    output_files = self._split_by_ranges(str(input_path), ranges)
-                else:
-                    raise HTTPException(status_code=400, detail="Split type must be 'each', 'pages', or 'range' with page specification")
-                
-                if not output_files:
-                    raise HTTPException(status_code=500, detail="Failed to split PDF")
-                
-                # Create zip file with all outputs
                 zip_filename = f"split_{Path(file.filename).stem}.zip"
                 zip_path = Path(get_unique_filename(zip_filename, str(self.output_dir)))
+
+                # Open once and reuse the handle for the page count and
+                # any range split (page splits open per worker process)
+                pdf = await asyncio.to_thread(pikepdf.open, str(input_path))
+                try:
+                    total_pages = len(pdf.pages)
+
+                    # Parse split configuration
+                    if split_type == "each":
+                        # Split each page into separate file, then zip
+                        output_files = await asyncio.to_thread(self._split_by_pages, str(input_path), total_pages)
+                        if not output_files:
+                            raise HTTPException(status_code=500, detail="Failed to split PDF")
+                        await asyncio.to_thread(self._zip_output_files, str(zip_path), output_files)
+                        self.cleanup_temp_files(*output_files)
+                    elif split_type in ("pages", "range") and pages:
+                        # Extract specific pages / split by page ranges,
+                        # streaming each output PDF straight into the ZIP
+                        ranges = self._parse_split_ranges(pages, total_pages)
+                        if not ranges:
+                            raise HTTPException(status_code=400, detail="Invalid page specification")
+                        entries = await asyncio.to_thread(
+                            self._split_ranges_into_zip, str(input_path), ranges, str(zip_path), pdf
+                        )
+                        if not entries:
+                            raise HTTPException(status_code=500, detail="Failed to split PDF")
+                    else:
+                        raise HTTPException(status_code=400, detail="Split type must be 'each', 'pages', or 'range' with page specification")
+                finally:
+                    pdf.close()
                 
-                with zipfile.ZipFile(str(zip_path), 'w') as zipf:
-                    for file_path in output_files:
-                        zipf.write(file_path, os.path.basename(file_path))
-                
-                # Cleanup individual files
-                self.cleanup_temp_files(*output_files)
-                
-                # Return the zip file
+                # Return the zip file - pass the stat result so
+                # Starlette can sendfile without re-statting
+                stat_result = zip_path.stat()
                 return FileResponse(
                     path=str(zip_path),
                     media_type="application/zip",
-                    filename=zip_path.name
+                    filename=zip_path.name,
+                    stat_result=stat_result
                 )
                 
             except Exception as e:
@@ -108,46 +136,56 @@ class PDFSplitService(BasePDFMicroservice):
                         detail=f"File not found: {request.file_name}"
                     )
                 
-                # Get PDF info
-                reader = PdfReader(input_path)
-                total_pages = len(reader.pages)
-                input_size = self.get_file_size_mb(input_path)
-                
-                self.logger.info(f"Splitting PDF: {request.file_name} ({total_pages} pages, {input_size:.2f} MB)")
-                
-                # Parse split configuration
-                if request.split_type == "pages":
-                    # Split each page into separate file
-                    output_files = self._split_by_pages(input_path, total_pages)
-                elif request.split_type == "ranges":
-                    # Split by page ranges
-                    ranges = self._parse_split_ranges(request.split_value, total_pages)
-                    if not ranges:
+                # Open once and reuse the handle for the page count and
+                # any range split (page splits open per worker process)
+                pdf = await asyncio.to_thread(pikepdf.open, input_path)
+                try:
+                    total_pages = len(pdf.pages)
+                    input_size = self.get_file_size_mb(input_path)
+
+                    self.logger.info(f"Splitting PDF: {request.file_name} ({total_pages} pages, {input_size:.2f} MB)")
+
+                    zip_filename = f"split_{os.path.splitext(request.file_name)[0]}.zip"
+                    zip_path = get_unique_filename(zip_filename, self.output_dir)
+
+                    # Parse split configuration
+                    if request.split_type == "pages":
+                        # Split each page into separate file, then zip
+                        output_files = await asyncio.to_thread(self._split_by_pages, input_path, total_pages)
+                        if not output_files:
+                            return self.create_response(
+                                success=False,
+                                message="Failed to split PDF",
+                                error_details="No output files were created"
+                            )
+                        await asyncio.to_thread(self._zip_output_files, zip_path, output_files)
+                        self.cleanup_temp_files(*output_files)
+                        files_created = len(output_files)
+                    elif request.split_type == "ranges":
+                        # Split by page ranges, streaming each output PDF
+                        # straight into the ZIP
+                        ranges = self._parse_split_ranges(request.split_value, total_pages)
+                        if not ranges:
+                            raise HTTPException(
+                                status_code=400,
+                                detail="Invalid page ranges specified"
+                            )
+                        files_created = await asyncio.to_thread(
+                            self._split_ranges_into_zip, input_path, ranges, zip_path, pdf
+                        )
+                        if not files_created:
+                            return self.create_response(
+                                success=False,
+                                message="Failed to split PDF",
+                                error_details="No output files were created"
+                            )
+                    else:
                         raise HTTPException(
                             status_code=400,
-                            detail="Invalid page ranges specified"
+                            detail="Split type must be 'pages' or 'ranges'"
                         )
-                    output_files = self._split_by_ranges(input_path, ranges)
-                else:
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Split type must be 'pages' or 'ranges'"
-                    )
-                
-                if not output_files:
-                    return self.create_response(
-                        success=False,
-                        message="Failed to split PDF",
-                        error_details="No output files were created"
-                    )
-                
-                # Create zip file with all outputs
-                zip_filename = f"split_{os.path.splitext(request.file_name)[0]}.zip"
-                zip_path = get_unique_filename(zip_filename, self.output_dir)
-                
-                with zipfile.ZipFile(zip_path, 'w') as zipf:
-                    for file_path in output_files:
-                        zipf.write(file_path, os.path.basename(file_path))
+                finally:
+                    pdf.close()
                 
                 # Calculate processing time and output info
                 processing_time = (time.time() - start_time) * 1000
@@ -157,20 +195,17 @@ class PDFSplitService(BasePDFMicroservice):
                 # Create download URL
                 file_url = f"http://{self.host}:{self.port}/download/{zip_filename}"
                 
-                # Cleanup individual files
-                self.cleanup_temp_files(*output_files)
-                
-                self.logger.info(f"Split completed: {len(output_files)} files created")
+                self.logger.info(f"Split completed: {files_created} files created")
                 
                 return self.create_response(
                     success=True,
-                    message=f"Successfully split PDF into {len(output_files)} files",
+                    message=f"Successfully split PDF into {files_created} files",
                     file_url=file_url,
                     file_size_mb=output_size,
                     processing_time_ms=processing_time,
                     metadata={
                         "split_type": request.split_type,
-                        "files_created": len(output_files),
+                        "files_created": files_created,
                         "total_pages": total_pages,
                         "zip_filename": zip_filename
                     }
@@ -189,93 +224,119 @@ class PDFSplitService(BasePDFMicroservice):
         """Get split service specific endpoints."""
         return ["/split", "/process"]
     
+    def _zip_output_files(self, zip_path: str, output_files: List[str]) -> None:
+        """
+        Zip the split outputs.
+
+        ZIP_STORED skips deflating the near-entropy PDF bytes, and each
+        entry is streamed in 1 MiB chunks so the copy uses large
+        read/write syscalls instead of whole-file buffers.
+        """
+        with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED,
+                             allowZip64=True) as zipf:
+            for file_path in output_files:
+                with zipf.open(os.path.basename(file_path), 'w', force_zip64=True) as dst, \
+                        open(file_path, 'rb', buffering=1024 * 1024) as src:
+                    shutil.copyfileobj(src, dst, length=1024 * 1024)
+
     def _split_by_pages(self, input_path: str, total_pages: int) -> List[str]:
         """Split PDF into individual pages."""
         try:
-            reader = PdfReader(input_path)
-            output_files = []
-            
-            for page_num in range(total_pages):
-                writer = PdfWriter()
-                writer.add_page(reader.pages[page_num])
-                
-                # Create output filename
-                base_name = os.path.splitext(os.path.basename(input_path))[0]
-                output_filename = f"{base_name}_page_{page_num + 1}.pdf"
-                output_path = get_unique_filename(output_filename, self.output_dir)
-                
-                # Write page to file
-                with open(output_path, "wb") as output_file:
-                    writer.write(output_file)
-                
-                output_files.append(output_path)
-            
+            base_name = os.path.splitext(os.path.basename(input_path))[0]
+
+            # Reserve all output names up front, then fan the page writes
+            # out across worker processes - each page file is independent
+            output_paths = [
+                get_unique_filename(f"{base_name}_page_{page_num + 1}.pdf", self.output_dir)
+                for page_num in range(total_pages)
+            ]
+
+            max_workers = min(total_pages, os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                output_files = list(executor.map(
+                    _write_single_page,
+                    repeat(input_path), range(total_pages), output_paths
+                ))
+
             return output_files
-            
+
         except Exception as e:
             self.logger.error(f"Error splitting by pages: {str(e)}")
             return []
-    
-    def _split_by_ranges(self, input_path: str, ranges: List[tuple]) -> List[str]:
-        """Split PDF by page ranges."""
+
+    def _split_ranges_into_zip(self, input_path: str, ranges: List[tuple],
+                               zip_path: str, src: Optional[pikepdf.Pdf] = None) -> int:
+        """
+        Split PDF by page ranges, writing each output PDF straight into
+        the archive.
+
+        Each writer saves to an in-memory buffer handed to
+        ZipFile.writestr, so no intermediate files are written, re-read
+        and deleted. Returns the number of entries written (0 on
+        failure). Reuses an already-open source if given.
+        """
         try:
-            reader = PdfReader(input_path)
-            output_files = []
-            
-            for i, (start_page, end_page) in enumerate(ranges):
-                writer = PdfWriter()
-                
-                # Add pages in range
-                for page_num in range(start_page, end_page + 1):
-                    if page_num < len(reader.pages):
-                        writer.add_page(reader.pages[page_num])
-                
-                # Create output filename
-                base_name = os.path.splitext(os.path.basename(input_path))[0]
-                output_filename = f"{base_name}_part_{i + 1}_pages_{start_page + 1}-{end_page + 1}.pdf"
-                output_path = get_unique_filename(output_filename, self.output_dir)
-                
-                # Write range to file
-                with open(output_path, "wb") as output_file:
-                    writer.write(output_file)
-                
-                output_files.append(output_path)
-            
-            return output_files
-            
+            base_name = os.path.splitext(os.path.basename(input_path))[0]
+
+            owns_src = src is None
+            if owns_src:
+                src = pikepdf.open(input_path)
+            try:
+                total_pages = len(src.pages)
+
+                # Map each page index to the outputs that need it so the
+                # source is traversed exactly once even when ranges
+                # overlap or cover the whole document
+                writers = []
+                arcnames = []
+                page_to_writers = [[] for _ in range(total_pages)]
+                for i, (start_page, end_page) in enumerate(ranges):
+                    writers.append(pikepdf.Pdf.new())
+                    arcnames.append(f"{base_name}_part_{i + 1}_pages_{start_page + 1}-{end_page + 1}.pdf")
+                    for page_num in range(start_page, min(end_page + 1, total_pages)):
+                        page_to_writers[page_num].append(i)
+
+                try:
+                    for page_num, page in enumerate(src.pages):
+                        for writer_idx in page_to_writers[page_num]:
+                            writers[writer_idx].pages.append(page)
+
+                    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED,
+                                         allowZip64=True) as zipf:
+                        for writer, arcname in zip(writers, arcnames):
+                            buffer = io.BytesIO()
+                            writer.save(buffer, linearize=False)
+                            zipf.writestr(arcname, buffer.getvalue())
+                finally:
+                    for writer in writers:
+                        writer.close()
+            finally:
+                if owns_src:
+                    src.close()
+
+            return len(arcnames)
+
         except Exception as e:
             self.logger.error(f"Error splitting by ranges: {str(e)}")
-            return []
+            return 0
     
     def _parse_split_ranges(self, ranges_str: str, total_pages: int) -> Optional[List[tuple]]:
         """Parse split ranges string into list of (start, end) tuples."""
-        try:
-            ranges = []
-            parts = [part.strip() for part in ranges_str.split(',')]
-            
-            for part in parts:
-                if '-' in part:
-                    start, end = part.split('-', 1)
-                    start_page = int(start.strip()) - 1  # Convert to 0-indexed
-                    end_page = int(end.strip()) - 1      # Convert to 0-indexed
-                    
-                    if start_page < 0 or end_page >= total_pages or start_page > end_page:
-                        return None
-                    
-                    ranges.append((start_page, end_page))
-                else:
-                    page_num = int(part.strip()) - 1  # Convert to 0-indexed
-                    
-                    if page_num < 0 or page_num >= total_pages:
-                        return None
-                    
-                    ranges.append((page_num, page_num))
-            
-            return ranges
-            
-        except (ValueError, AttributeError):
+        if not ranges_str or not _RANGES_SYNTAX_RE.match(ranges_str):
             return None
 
+        ranges = []
+        for match in _RANGE_PART_RE.finditer(ranges_str):
+            start_page = int(match.group(1)) - 1  # Convert to 0-indexed
+            end_page = int(match.group(2)) - 1 if match.group(2) else start_page
+
+            if start_page < 0 or end_page >= total_pages or start_page > end_page:
+                return None
+
+            ranges.append((start_page, end_page))
+
+        return ranges
+
 
 def create_split_service(**kwargs):
     """Factory function to create split service."""
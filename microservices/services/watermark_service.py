@@ -5,11 +5,16 @@ Handles adding watermarks to PDF files.
 import os
 import sys
 import time
+import shutil
+import asyncio
+from functools import lru_cache
 from pathlib import Path
 from io import BytesIO
 
-from PyPDF2 import PdfReader, PdfWriter
+import aiofiles
+import pikepdf
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase.pdfmetrics import getFont, stringWidth
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.colors import Color
 from fastapi import HTTPException, UploadFile, File, Form
@@ -24,6 +29,15 @@ from microservices.common.models import (
 )
 from utils.file_ops import get_unique_filename, get_file_size_mb
 
+# Uploads at or below this stay in memory and skip the disk round trip
+_MEM_UPLOAD_LIMIT = 50 * 1024 * 1024
+
+
+class LargeChunkFileResponse(FileResponse):
+    """FileResponse reading 1 MiB chunks - multi-MB watermarked PDFs
+    move in a handful of reads instead of 64 KiB slices."""
+    chunk_size = 1024 * 1024
+
 
 class PDFWatermarkService(BasePDFMicroservice):
     """PDF Watermark microservice."""
@@ -35,6 +49,10 @@ class PDFWatermarkService(BasePDFMicroservice):
             host=host,
             port=port
         )
+
+        # Warm reportlab's font-metric cache once at startup so the
+        # first request doesn't pay the lookup
+        getFont("Helvetica-Bold")
     
     def _register_service_routes(self):
         """Register service-specific routes."""
@@ -50,19 +68,34 @@ class PDFWatermarkService(BasePDFMicroservice):
         ):
             """Process PDF file - add watermark."""
             try:
-                # Save uploaded file
+                # Keep small uploads in memory and feed them straight
+                # to the PDF engine; spill to disk past the threshold so
+                # huge files don't blow RAM
                 input_path = Path(self.upload_dir) / file.filename
-                with open(input_path, "wb") as f:
-                    content = await file.read()
-                    f.write(content)
+                buffer = BytesIO()
+                while chunk := await file.read(1024 * 1024):
+                    buffer.write(chunk)
+                    if buffer.tell() > _MEM_UPLOAD_LIMIT:
+                        break
+
+                if buffer.tell() > _MEM_UPLOAD_LIMIT:
+                    async with aiofiles.open(input_path, "wb") as f:
+                        await f.write(buffer.getvalue())
+                        while chunk := await file.read(1024 * 1024):
+                            await f.write(chunk)
+                    source = str(input_path)
+                else:
+                    buffer.seek(0)
+                    source = buffer
                 
                 # Generate output filename
                 output_filename = f"watermarked_{file.filename}"
                 output_path = Path(get_unique_filename(output_filename, str(self.output_dir)))
                 
-                # Add watermark to PDF
-                success = await self._add_watermark_to_pdf(
-                    str(input_path),
+                # Add watermark to PDF (CPU-bound - run off the event loop)
+                success = await asyncio.to_thread(
+                    self._add_watermark_to_pdf,
+                    source,
                     str(output_path),
                     text,
                     opacity,
@@ -75,7 +108,7 @@ class PDFWatermarkService(BasePDFMicroservice):
                     raise HTTPException(status_code=500, detail="Failed to add watermark to PDF")
                 
                 # Return the watermarked file
-                return FileResponse(
+                return LargeChunkFileResponse(
                     path=str(output_path),
                     media_type="application/pdf",
                     filename=output_path.name
@@ -100,8 +133,9 @@ class PDFWatermarkService(BasePDFMicroservice):
                 output_filename = f"watermarked_{request.file_name}"
                 output_path = Path(get_unique_filename(output_filename, str(self.output_dir)))
                 
-                # Add watermark to PDF
-                success = await self._add_watermark_to_pdf(
+                # Add watermark to PDF (CPU-bound - run off the event loop)
+                success = await asyncio.to_thread(
+                    self._add_watermark_to_pdf,
                     str(input_path),
                     str(output_path),
                     request.watermark_text,
@@ -154,6 +188,12 @@ class PDFWatermarkService(BasePDFMicroservice):
         """Get service-specific endpoints."""
         return ["/watermark", "/process"]
     
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _string_width(text: str, font: str, size: int) -> float:
+        """Memoized text-width lookup - the metric math is pure."""
+        return stringWidth(text, font, size)
+
     def _create_text_watermark(self, text: str, opacity: float = 0.3, rotation: int = 45, 
                               font_size: int = 50, color: tuple = (0.5, 0.5, 0.5),
                               position: str = "center", page_width: float = None, 
@@ -182,7 +222,9 @@ class PDFWatermarkService(BasePDFMicroservice):
         else:
             pagesize = letter
         
-        can = canvas.Canvas(packet, pagesize=pagesize)
+        # pageCompression=0: the stream is a few hundred bytes of text
+        # operators, and qpdf would just inflate it again to overlay it
+        can = canvas.Canvas(packet, pagesize=pagesize, pageCompression=0)
         width, height = pagesize
         
         # Set transparency and color
@@ -192,7 +234,7 @@ class PDFWatermarkService(BasePDFMicroservice):
         can.setFont("Helvetica-Bold", font_size)
         
         # Calculate position
-        text_width = can.stringWidth(text, "Helvetica-Bold", font_size)
+        text_width = self._string_width(text, "Helvetica-Bold", font_size)
         
         if position == "center":
             x = (width - text_width) / 2
@@ -230,14 +272,14 @@ class PDFWatermarkService(BasePDFMicroservice):
         packet.seek(0)
         return packet
     
-    async def _add_watermark_to_pdf(self, input_path: str, output_path: str, 
-                                   watermark_text: str, opacity: float,
-                                   font_size: int, position: str, rotation: int = 0) -> bool:
+    def _add_watermark_to_pdf(self, source, output_path: str,
+                              watermark_text: str, opacity: float,
+                              font_size: int, position: str, rotation: int = 0) -> bool:
         """
         Add watermark to all pages of a PDF file.
         
         Args:
-            input_path: Path to input PDF
+            source: Path to input PDF, or a seekable binary file object
             output_path: Path to save watermarked PDF
             watermark_text: Text to use as watermark
             opacity: Watermark opacity (0-1)
@@ -249,48 +291,58 @@ class PDFWatermarkService(BasePDFMicroservice):
             bool: True if successful, False otherwise
         """
         try:
-            # Open the PDF
-            reader = PdfReader(input_path)
-            writer = PdfWriter()
-            
-            # Process each page
-            for page_num, page in enumerate(reader.pages):
-                try:
-                    # Get page dimensions
-                    page_box = page.mediabox
-                    page_width = float(page_box.width)
-                    page_height = float(page_box.height)
-                    
-                    # Create watermark for this page size
-                    watermark_pdf = self._create_text_watermark(
-                        text=watermark_text,
-                        opacity=opacity,
-                        rotation=rotation,
-                        font_size=font_size,
-                        position=position,
-                        page_width=page_width,
-                        page_height=page_height
-                    )
-                    
-                    # Read watermark PDF
-                    watermark_reader = PdfReader(watermark_pdf)
-                    watermark_page = watermark_reader.pages[0]
-                    
-                    # Merge watermark with page
-                    page.merge_page(watermark_page)
-                    writer.add_page(page)
-                    
-                except Exception as e:
-                    self.logger.warning(f"Error adding watermark to page {page_num + 1}: {str(e)}")
-                    # Add page without watermark if there's an error
-                    writer.add_page(page)
-            
-            # Save the watermarked PDF
-            with open(output_path, "wb") as output_file:
-                writer.write(output_file)
-            
+            # Nothing visible would be drawn - skip the parse/overlay
+            # work entirely and hand back a copy
+            if not watermark_text.strip() or opacity <= 0.0:
+                if isinstance(source, str):
+                    shutil.copyfile(source, output_path)
+                else:
+                    source.seek(0)
+                    with open(output_path, "wb") as out:
+                        shutil.copyfileobj(source, out)
+                return True
+
+            with pikepdf.open(source) as pdf:
+                # One Form XObject per distinct page size: the watermark
+                # content stream is stored once and every page just
+                # references it with a Do operator, instead of
+                # merge_page inlining a fresh copy into each page
+                xobject_cache = {}
+
+                # Extract every page size in one sweep so the numeric
+                # conversions happen once, then iterate pages alongside
+                # the precomputed dimensions
+                sizes = []
+                for page in pdf.pages:
+                    box = page.mediabox
+                    sizes.append((float(box[2]) - float(box[0]),
+                                  float(box[3]) - float(box[1])))
+
+                for page, (page_width, page_height) in zip(pdf.pages, sizes):
+                    cache_key = (round(page_width, 2), round(page_height, 2))
+                    xobject = xobject_cache.get(cache_key)
+                    if xobject is None:
+                        watermark_pdf = self._create_text_watermark(
+                            text=watermark_text,
+                            opacity=opacity,
+                            rotation=rotation,
+                            font_size=font_size,
+                            position=position,
+                            page_width=page_width,
+                            page_height=page_height
+                        )
+                        with pikepdf.open(watermark_pdf) as wm_pdf:
+                            wm_page = pikepdf.Page(wm_pdf.pages[0])
+                            xobject = pdf.copy_foreign(wm_page.as_form_xobject())
+                        xobject_cache[cache_key] = xobject
+
+                    name = page.add_resource(xobject, pikepdf.Name.XObject)
+                    page.contents_add(f"q {name} Do Q".encode("ascii"), prepend=False)
+
+                pdf.save(output_path)
+
             return True
-            
+
         except Exception as e:
             self.logger.error(f"Error adding watermark to PDF: {str(e)}")
             return False
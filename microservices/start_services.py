@@ -8,6 +8,7 @@ import os
 import sys
 import time
 import signal
+import socket
 import subprocess
 import threading
 from pathlib import Path
@@ -38,7 +39,7 @@ class ServiceManager:
             # "pdf_to_word": ("pdf_to_word_service.py", 8013),  # Not implemented yet
             # "word_to_pdf": ("word_to_pdf_service.py", 8014),  # Not implemented yet
             # "pdf_to_excel": ("pdf_to_excel_service.py", 8015),  # Not implemented yet
-            # "excel_to_pdf": ("excel_to_pdf_service.py", 8016),  # Not implemented yet
+            "excel_to_pdf": ("excel_to_pdf_service.py", 8016),
             # "pdf_to_html": ("pdf_to_html_service.py", 8017),  # Not implemented yet
             # "html_to_pdf": ("html_to_pdf_service.py", 8018),  # Disabled - GTK issues on Windows
             # "pdf_to_powerpoint": ("pdf_to_powerpoint_service.py", 8019),  # Not implemented yet
@@ -48,6 +49,13 @@ class ServiceManager:
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
+        
+        # Wake the monitor the moment a child exits (POSIX only -
+        # Windows falls back to the periodic poll)
+        self._child_exited = threading.Event()
+        if hasattr(signal, "SIGCHLD"):
+            signal.signal(signal.SIGCHLD,
+                          lambda signum, frame: self._child_exited.set())
     
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals."""
@@ -55,41 +63,71 @@ class ServiceManager:
         self.stop_all_services()
         sys.exit(0)
     
+    def _service_log_file(self, name: str):
+        """Open an append-mode log file for a service's output.
+
+        Unread PIPEs fill their 64 KiB buffer and block the child; a
+        log file gives the output somewhere to go with no backpressure.
+        """
+        logs_dir = Path(__file__).parent / "logs"
+        logs_dir.mkdir(exist_ok=True)
+        return open(logs_dir / f"{name}.log", "ab")
+
+    def _launch_service(self, name: str, script_path: str, port: int):
+        """Spawn a service process without waiting for readiness."""
+        print(f"Starting {name} service on port {port}...")
+        
+        # Change to services directory
+        services_dir = Path(__file__).parent / "services"
+        
+        # Start service process, output redirected to its log file
+        log_file = self._service_log_file(name)
+        process = subprocess.Popen(
+            [sys.executable, script_path],
+            cwd=services_dir,
+            stdout=log_file,
+            stderr=subprocess.STDOUT
+        )
+        log_file.close()
+        
+        self.services[name] = {
+            "process": process,
+            "port": port,
+            "script": script_path
+        }
+        
+        return process
+
+    def _wait_for_port(self, port: int, timeout: float = 10.0) -> bool:
+        """Poll a TCP port until it accepts connections or timeout expires."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                with socket.create_connection(("localhost", port), timeout=0.1):
+                    return True
+            except OSError:
+                time.sleep(0.1)
+        return False
+
+    def _confirm_service(self, name: str, port: int) -> bool:
+        """Check that a launched service came up and is listening."""
+        process = self.services[name]["process"]
+        
+        if self._wait_for_port(port) and process.poll() is None:
+            print(f"✅ {name} service started successfully (PID: {process.pid})")
+            return True
+        
+        if process.poll() is not None:
+            print(f"❌ {name} service failed to start (see logs/{name}.log)")
+        else:
+            print(f"❌ {name} service did not become ready on port {port}")
+        return False
+
     def start_service(self, name: str, script_path: str, port: int) -> bool:
-        """Start a single microservice."""
+        """Start a single microservice and wait for it to become ready."""
         try:
-            print(f"Starting {name} service on port {port}...")
-            
-            # Change to services directory
-            services_dir = Path(__file__).parent / "services"
-            
-            # Start service process
-            process = subprocess.Popen(
-                [sys.executable, script_path],
-                cwd=services_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            self.services[name] = {
-                "process": process,
-                "port": port,
-                "script": script_path
-            }
-            
-            # Wait a moment to check if it started successfully
-            time.sleep(2)
-            
-            if process.poll() is None:
-                print(f"✅ {name} service started successfully (PID: {process.pid})")
-                return True
-            else:
-                stdout, stderr = process.communicate()
-                print(f"❌ {name} service failed to start:")
-                if stderr:
-                    print(f"Error: {stderr.decode()}")
-                return False
-                
+            self._launch_service(name, script_path, port)
+            return self._confirm_service(name, port)
         except Exception as e:
             print(f"❌ Failed to start {name} service: {str(e)}")
             return False
@@ -102,25 +140,21 @@ class ServiceManager:
             # Change to orchestrator directory
             orchestrator_dir = Path(__file__).parent / "orchestrator"
             
-            # Start orchestrator process
+            # Start orchestrator process, output redirected to its log file
+            log_file = self._service_log_file("orchestrator")
             self.orchestrator_process = subprocess.Popen(
                 [sys.executable, "main.py"],
                 cwd=orchestrator_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+                stdout=log_file,
+                stderr=subprocess.STDOUT
             )
+            log_file.close()
             
-            # Wait a moment to check if it started successfully
-            time.sleep(3)
-            
-            if self.orchestrator_process.poll() is None:
+            if self._wait_for_port(8000) and self.orchestrator_process.poll() is None:
                 print(f"✅ Orchestrator started successfully (PID: {self.orchestrator_process.pid})")
                 return True
             else:
-                stdout, stderr = self.orchestrator_process.communicate()
-                print("❌ Orchestrator failed to start:")
-                if stderr:
-                    print(f"Error: {stderr.decode()}")
+                print("❌ Orchestrator failed to start (see logs/orchestrator.log)")
                 return False
                 
         except Exception as e:
@@ -134,14 +168,22 @@ class ServiceManager:
         
         failed_services = []
         
-        # Start individual services
+        # Launch every service at once, then confirm readiness by
+        # polling their ports - wall time is the slowest service's
+        # startup, not a fixed 2s sleep per service
+        for name, (script, port) in self.service_configs.items():
+            try:
+                self._launch_service(name, script, port)
+            except Exception as e:
+                print(f"❌ Failed to start {name} service: {str(e)}")
+                failed_services.append(name)
+        
         for name, (script, port) in self.service_configs.items():
-            if not self.start_service(name, script, port):
+            if name in self.services and not self._confirm_service(name, port):
                 failed_services.append(name)
         
         # Start orchestrator if we have at least some services running
         if len(self.services) > 0:
-            time.sleep(2)  # Give services time to fully initialize
             orchestrator_success = self.start_orchestrator()
         else:
             orchestrator_success = False
@@ -228,8 +270,15 @@ class ServiceManager:
     
     def monitor_services(self):
         """Monitor services and restart if needed."""
+        has_sigchld = hasattr(signal, "SIGCHLD")
         while self.running:
-            time.sleep(10)
+            if has_sigchld:
+                # SIGCHLD sets the event as soon as a service dies;
+                # the 10s timeout is only a heartbeat safety net
+                self._child_exited.wait(timeout=10)
+                self._child_exited.clear()
+            else:
+                time.sleep(10)
             
             status = self.check_service_status()
             
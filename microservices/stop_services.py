@@ -7,6 +7,7 @@ Stops all running microservices and the orchestrator
 import os
 import sys
 import time
+import signal
 import psutil
 import socket
 from pathlib import Path
@@ -65,10 +66,23 @@ class ServiceStopper:
             8020: "PowerPoint to PDF",
         }
     
+    def snapshot_port_map(self) -> dict:
+        """Build a port -> pid map of listening sockets in one scan."""
+        port_map = {}
+        try:
+            for conn in psutil.net_connections(kind="inet"):
+                if conn.status == 'LISTEN' and conn.laddr:
+                    port_map[conn.laddr.port] = conn.pid
+        except (psutil.AccessDenied, psutil.NoSuchProcess):
+            pass
+        return port_map
+
     def find_process_by_port(self, port: int):
         """Find process ID using a specific port."""
         try:
-            for conn in psutil.net_connections():
+            # "tcp" keeps the scan to inet TCP sockets - the default
+            # also enumerates UDP and UNIX domain sockets
+            for conn in psutil.net_connections(kind="tcp"):
                 if conn.laddr.port == port and conn.status == 'LISTEN':
                     return conn.pid
         except (psutil.AccessDenied, psutil.NoSuchProcess):
@@ -78,31 +92,32 @@ class ServiceStopper:
     def stop_process(self, pid: int, name: str) -> bool:
         """Stop a process by PID."""
         try:
-            process = psutil.Process(pid)
-            process_name = process.name()
+            print(f"  Stopping {name} (PID: {pid})...")
             
-            print(f"  Stopping {name} (PID: {pid}, Process: {process_name})...")
+            # Signal directly - no need to walk /proc building a
+            # psutil.Process just to deliver SIGTERM
+            os.kill(pid, signal.SIGTERM)
             
-            # Try graceful termination first
-            process.terminate()
+            # Wait up to 5 seconds for the process to exit
+            deadline = time.time() + 5
+            while time.time() < deadline:
+                try:
+                    os.kill(pid, 0)
+                except OSError:
+                    print(f"  ✅ {name} stopped gracefully")
+                    return True
+                time.sleep(0.1)
             
-            # Wait up to 5 seconds for process to terminate
-            try:
-                process.wait(timeout=5)
-                print(f"  ✅ {name} stopped gracefully")
-                return True
-            except psutil.TimeoutExpired:
-                # Force kill if still running
-                print(f"  ⚠️  {name} didn't stop gracefully, force killing...")
-                process.kill()
-                process.wait(timeout=2)
-                print(f"  🔥 {name} force killed")
-                return True
-                
-        except psutil.NoSuchProcess:
+            # Force kill if still running (SIGKILL is POSIX-only)
+            print(f"  ⚠️  {name} didn't stop gracefully, force killing...")
+            os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            print(f"  🔥 {name} force killed")
+            return True
+            
+        except ProcessLookupError:
             print(f"  ℹ️  {name} already stopped")
             return True
-        except psutil.AccessDenied:
+        except PermissionError:
             print(f"  ❌ Access denied to stop {name} (try running as administrator)")
             return False
         except Exception as e:
@@ -120,10 +135,13 @@ class ServiceStopper:
             "failed": []
         }
         
+        # One connection scan for all ports instead of one per port
+        port_map = self.snapshot_port_map()
+
         # Check each port for running services
         for port in self.ports:
             service_name = self.service_names.get(port, f"Service on port {port}")
-            pid = self.find_process_by_port(port)
+            pid = port_map.get(port)
             
             if pid:
                 if self.stop_process(pid, service_name):
@@ -166,10 +184,13 @@ class ServiceStopper:
         
         running_services = []
         stopped_services = []
-        
+
+        # One connection scan for all ports instead of one per port
+        port_map = self.snapshot_port_map()
+
         for port in self.ports:
             service_name = self.service_names.get(port, f"Service on port {port}")
-            pid = self.find_process_by_port(port)
+            pid = port_map.get(port)
             
             if pid:
                 try: